@@ -0,0 +1,215 @@
+"""Class-wide exam analytics on NumPy arrays.
+
+A class's marks are loaded once into a students x exams matrix (NaN where a
+student has no mark, i.e. was absent) and every statistic is derived from
+that matrix with array operations instead of per-exam SQL aggregates.
+Absent students are never ranked and are left out of the exam statistics.
+"""
+import numpy as np
+
+# (lowest percentage, grade), highest band first
+GRADE_BANDS = [(80, "A+"), (70, "A"), (60, "A-"), (50, "B"), (40, "C"), (33, "D"), (0, "F")]
+GRADES = [grade for _, grade in GRADE_BANDS]
+
+
+def rank_columns(scores, present):
+    """Dense and competition ranks (1 = best) of each column of scores.
+
+    Both are int arrays shaped like scores, 0 where a score is not present.
+    Ties share a rank: dense ranks go 1, 1, 2 and competition ranks 1, 1, 3.
+    """
+    rows, cols = np.nonzero(present)
+    values = scores[rows, cols]
+    # Group by column, best score first
+    order = np.lexsort((-values, cols))
+    rows, cols, values = rows[order], cols[order], values[order]
+    positions = np.arange(len(values))
+
+    column_start = np.ones(len(values), dtype=bool)
+    column_start[1:] = cols[1:] != cols[:-1]
+    new_value = column_start.copy()
+    new_value[1:] |= values[1:] != values[:-1]
+
+    distinct = np.cumsum(new_value)
+    first_in_column = np.maximum.accumulate(np.where(column_start, positions, 0))
+    first_of_value = np.maximum.accumulate(np.where(new_value, positions, 0))
+
+    dense = np.zeros(scores.shape, dtype=int)
+    competition = np.zeros(scores.shape, dtype=int)
+    dense[rows, cols] = distinct - distinct[first_in_column] + 1
+    competition[rows, cols] = first_of_value - first_in_column + 1
+    return dense, competition
+
+
+def grade_index(percent):
+    """Index into GRADE_BANDS for each percentage."""
+    floors = np.array([low for low, _ in reversed(GRADE_BANDS)])
+    return np.clip(len(GRADE_BANDS) - np.searchsorted(floors, percent, side="right"), 0, len(GRADE_BANDS) - 1)
+
+
+class ClassAnalytics:
+    """Exam statistics for the active students of one class.
+
+    Per cell (student x exam): marks, percent, dense_rank, competition_rank,
+    percentile, grade. Per exam: present_count, mean, std, highest, lowest,
+    grade_counts (bands x exams). Per student: average_percent, trend_slope
+    (percentage points per exam, in exam date order; NaN with fewer than two
+    marks), absentee_rate and overall ranks on average_percent.
+    """
+
+    def __init__(self, class_name, students, exams, marks):
+        self.class_name = class_name
+        self.students = students          # (unique_student_id, name)
+        self.exams = exams                # Exams rows in date order
+        self.marks = marks
+        self.total_marks = np.array([e[3] for e in exams], dtype=float)
+        self._compute()
+
+    def _compute(self):
+        marks = self.marks
+        present = self.present = ~np.isnan(marks)
+        counts = self.present_count = present.sum(axis=0)
+        n_students, n_exams = marks.shape
+        safe_counts = np.maximum(counts, 1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.percent = marks / self.total_marks * 100
+        filled = np.where(present, marks, 0.0)
+
+        self.mean = filled.sum(axis=0) / safe_counts
+        self.std = np.sqrt((np.where(present, marks - self.mean, 0.0) ** 2).sum(axis=0) / safe_counts)
+        self.highest = np.where(counts > 0, np.where(present, marks, -np.inf).max(axis=0, initial=-np.inf), 0.0)
+        self.lowest = np.where(counts > 0, np.where(present, marks, np.inf).min(axis=0, initial=np.inf), 0.0)
+        self.exam_absentee_rate = 1 - counts / max(n_students, 1)
+
+        self.dense_rank, self.competition_rank = rank_columns(marks, present)
+        # Share of the students who sat the exam scoring at or below this one
+        self.percentile = np.where(present, (counts - self.competition_rank + 1) / safe_counts * 100, np.nan)
+
+        grades = self.grade = np.where(present, grade_index(np.nan_to_num(self.percent)), -1)
+        self.grade_counts = (grades[None, :, :] == np.arange(len(GRADE_BANDS))[:, None, None]).sum(axis=1)
+
+        attended = present.sum(axis=1)
+        percent = np.where(present, self.percent, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.average_percent = np.where(attended > 0, percent.sum(axis=1) / attended, np.nan)
+            self.absentee_rate = 1 - attended / n_exams if n_exams else np.zeros(n_students)
+
+            # Least-squares slope of percent against exam number, present exams only
+            x = np.where(present, np.arange(n_exams, dtype=float), 0.0)
+            sx, sy = x.sum(axis=1), percent.sum(axis=1)
+            sxx, sxy = (x * x).sum(axis=1), (x * percent).sum(axis=1)
+            denominator = attended * sxx - sx * sx
+            self.trend_slope = np.where(denominator > 0, (attended * sxy - sx * sy) / denominator, np.nan)
+
+        has_average = ~np.isnan(self.average_percent)
+        dense, competition = rank_columns(self.average_percent[:, None], has_average[:, None])
+        self.overall_dense_rank, self.overall_rank = dense[:, 0], competition[:, 0]
+
+    def exam_index(self, exam_id):
+        for i, exam in enumerate(self.exams):
+            if exam[0] == exam_id:
+                return i
+        raise KeyError(exam_id)
+
+    def exam_result(self, exam_id):
+        """Result sheet data for one exam, in the shape of pdf_generator.fetch_exam_result_data.
+
+        students_marks is ordered by rank with absent students last; ranks
+        holds the matching competition rank (None when absent).
+        """
+        j = self.exam_index(exam_id)
+        exam_id, class_name, exam_name, total_marks, exam_date = self.exams[j]
+        ranks = self.competition_rank[:, j]
+        # Ranked students by rank, then the absent ones in roster order
+        order = np.lexsort((np.arange(len(ranks)), np.where(ranks > 0, ranks, len(ranks) + 1)))
+        students_marks, result_ranks = [], []
+        for i in order:
+            std_id, name = self.students[i]
+            ranked = bool(self.present[i, j])
+            students_marks.append((std_id, name, float(self.marks[i, j]) if ranked else None))
+            result_ranks.append(int(ranks[i]) if ranked else None)
+        return {
+            "exam_id": exam_id,
+            "exam_name": exam_name,
+            "class_name": class_name,
+            "total_marks": total_marks,
+            "exam_date": exam_date,
+            "highest": float(self.highest[j]),
+            "average": float(self.mean[j]),
+            "std_dev": float(self.std[j]),
+            "present": int(self.present_count[j]),
+            "absent": len(self.students) - int(self.present_count[j]),
+            "students_marks": students_marks,
+            "ranks": result_ranks,
+        }
+
+    def exam_summaries(self):
+        """One dict per exam: name, date, present/absent, mean, std, highest and grade counts."""
+        return [{
+            "exam_id": exam[0],
+            "exam_name": exam[2],
+            "exam_date": exam[4],
+            "total_marks": exam[3],
+            "present": int(self.present_count[j]),
+            "absent": len(self.students) - int(self.present_count[j]),
+            "mean": float(self.mean[j]),
+            "std": float(self.std[j]),
+            "highest": float(self.highest[j]),
+            "lowest": float(self.lowest[j]),
+            "grades": dict(zip(GRADES, (int(c) for c in self.grade_counts[:, j]))),
+        } for j, exam in enumerate(self.exams)]
+
+    def student_summaries(self):
+        """One dict per student, best overall rank first (students with no marks last)."""
+        ranks = np.where(self.overall_rank > 0, self.overall_rank, len(self.students) + 1)
+        rows = []
+        for i in np.lexsort((np.arange(len(ranks)), ranks)):
+            std_id, name = self.students[i]
+            rows.append({
+                "student_id": std_id,
+                "name": name,
+                "rank": int(self.overall_rank[i]) or None,
+                "average_percent": None if np.isnan(self.average_percent[i]) else float(self.average_percent[i]),
+                "trend_slope": None if np.isnan(self.trend_slope[i]) else float(self.trend_slope[i]),
+                "absentee_rate": float(self.absentee_rate[i]),
+            })
+        return rows
+
+
+def load_class_marks(db, class_name, exams=None):
+    """(students, exams, marks matrix) for the active students of class_name.
+
+    exams defaults to every exam of the class; marks of other exams are ignored.
+    """
+    if exams is None:
+        exams = db.get_exams(class_name)
+    students = [(r[0], r[1]) for r in db.iter_query("""
+        SELECT unique_student_id, name FROM Students
+        WHERE current_class = ? AND status = 'active'
+        ORDER BY id
+    """, (class_name,))]
+
+    marks = np.full((len(students), len(exams)), np.nan)
+    if students and exams:
+        student_index = {std_id: i for i, (std_id, _) in enumerate(students)}
+        exam_index = {e[0]: j for j, e in enumerate(exams)}
+        rows, cols, values = [], [], []
+        for std_id, exam_id, obtained in db.iter_query(f"""
+            SELECT student_unique_id, exam_id, obtained_marks FROM Marks
+            WHERE exam_id IN ({','.join('?' * len(exams))})
+        """, list(exam_index)):
+            i = student_index.get(std_id)
+            if i is not None and obtained is not None:
+                rows.append(i)
+                cols.append(exam_index[exam_id])
+                values.append(obtained)
+        if values:
+            marks[rows, cols] = values
+    return students, exams, marks
+
+
+def analyze_class(db, class_name, exams=None):
+    """ClassAnalytics for class_name over exams (default: all of the class's exams)."""
+    students, exams, marks = load_class_marks(db, class_name, exams)
+    return ClassAnalytics(class_name, students, exams, marks)
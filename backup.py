@@ -0,0 +1,169 @@
+"""Online backups of the database with sqlite3's backup API.
+
+A backup copies the live database a few pages at a time (sleeping between
+steps so app queries keep running), checks the copy with PRAGMA
+integrity_check, gzips it and writes a sha256sum-style checksum file next to
+it. Only the newest `keep` snapshots are kept. Restoring verifies the
+checksum and the snapshot's integrity first, keeps a snapshot of the current
+data, then copies the backup into the live database with the same API, so no
+file is replaced under open connections.
+"""
+import glob
+import gzip
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+BACKUP_DIR = "backups"
+KEEP = 7
+PAGES_PER_STEP = 256
+STEP_SLEEP = 0.005
+# gzip level 6 is ~3x faster than the default 9 for ~1% larger files
+COMPRESS_LEVEL = 6
+PREFIX = "coaching_center_"
+
+
+class BackupError(Exception):
+    pass
+
+
+def _copy_database(source, target, pages, sleep, progress_callback):
+    # progress_callback(done, total) counts pages and may raise to abort the copy
+    def progress(status, remaining, total):
+        if progress_callback:
+            progress_callback(total - remaining, total)
+        if remaining:
+            time.sleep(sleep)
+
+    source.backup(target, pages=pages, progress=progress)
+
+
+def _check_integrity(path):
+    conn = sqlite3.connect(path)
+    try:
+        result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+    finally:
+        conn.close()
+    if result != "ok":
+        raise BackupError(f"Integrity check failed: {result}")
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def list_backups(backup_dir=BACKUP_DIR):
+    """Backup files in backup_dir, newest first."""
+    return sorted(glob.glob(os.path.join(backup_dir, PREFIX + "*.db.gz")), reverse=True)
+
+
+def rotate_backups(backup_dir=BACKUP_DIR, keep=KEEP):
+    """Delete all but the newest `keep` backups (and their checksum files). Returns the deleted paths."""
+    removed = list_backups(backup_dir)[keep:]
+    for path in removed:
+        for p in (path, path + ".sha256"):
+            if os.path.exists(p):
+                os.remove(p)
+    return removed
+
+
+def create_backup(db_path, backup_dir=BACKUP_DIR, keep=KEEP, pages=PAGES_PER_STEP, sleep=STEP_SLEEP,
+                  label="", progress_callback=None):
+    """Snapshot db_path into backup_dir as a verified, checksummed .db.gz. Returns its absolute path."""
+    os.makedirs(backup_dir, exist_ok=True)
+    name = f"{PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}{label}.db.gz"
+    path = os.path.join(backup_dir, name)
+    fd, snapshot = tempfile.mkstemp(suffix=".db", dir=backup_dir)
+    os.close(fd)
+    try:
+        source = sqlite3.connect(db_path)
+        target = sqlite3.connect(snapshot)
+        try:
+            _copy_database(source, target, pages, sleep, progress_callback)
+        finally:
+            target.close()
+            source.close()
+        _check_integrity(snapshot)
+
+        with open(snapshot, "rb") as src, gzip.open(path, "wb", compresslevel=COMPRESS_LEVEL) as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        with open(path + ".sha256", "w") as f:
+            f.write(f"{_sha256(path)}  {name}\n")
+    except BaseException:
+        for p in (path, path + ".sha256"):
+            if os.path.exists(p):
+                os.remove(p)
+        raise
+    finally:
+        os.remove(snapshot)
+    rotate_backups(backup_dir, keep)
+    return os.path.abspath(path)
+
+
+def _verify_checksum(path):
+    checksum_file = path + ".sha256"
+    if not os.path.exists(checksum_file):
+        raise BackupError(f"No checksum file for {os.path.basename(path)}")
+    with open(checksum_file) as f:
+        expected = f.read().split()[0]
+    if _sha256(path) != expected:
+        raise BackupError(f"Checksum mismatch for {os.path.basename(path)}")
+
+
+def verify_backup(path):
+    """Raise BackupError unless the file matches its checksum and holds an intact database."""
+    _verify_checksum(path)
+    _extract(path, check_only=True)
+
+
+def _extract(path, check_only=False):
+    # Decompress to a temporary file and integrity-check it; returns its path
+    fd, snapshot = tempfile.mkstemp(suffix=".db", dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    try:
+        with gzip.open(path, "rb") as src, open(snapshot, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        _check_integrity(snapshot)
+    except (OSError, EOFError, sqlite3.DatabaseError) as e:
+        os.remove(snapshot)
+        raise BackupError(f"{os.path.basename(path)} is not a readable backup: {e}")
+    except BaseException:
+        os.remove(snapshot)
+        raise
+    if check_only:
+        os.remove(snapshot)
+        return None
+    return snapshot
+
+
+def restore_backup(db_path, path, backup_dir=BACKUP_DIR, keep=KEEP, pages=PAGES_PER_STEP, sleep=STEP_SLEEP,
+                   progress_callback=None):
+    """Replace the contents of db_path with a verified backup.
+
+    The current data is first saved as a "_before_restore" backup. Callers
+    should re-run schema migrations afterwards, since the snapshot may come
+    from an older version. Returns the path of the safety backup.
+    """
+    _verify_checksum(path)
+    snapshot = _extract(path)
+    try:
+        safety = create_backup(db_path, backup_dir, keep=max(keep, 1) + 1, pages=pages, sleep=sleep,
+                               label="_before_restore")
+        source = sqlite3.connect(snapshot)
+        target = sqlite3.connect(db_path)
+        try:
+            _copy_database(source, target, pages, sleep, progress_callback)
+        finally:
+            target.close()
+            source.close()
+    finally:
+        os.remove(snapshot)
+    return safety
@@ -0,0 +1,158 @@
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import analytics
+from pdf_generator import PDF, add_result_sheet, render_exam_result_pdf
+
+
+def collect_exam_results(db_instance, class_name=None, date_from=None, date_to=None):
+    """Pre-fetch result data for every matching exam so workers never touch the database.
+
+    Each class's marks are loaded and analysed once for all of its exams.
+    """
+    by_class = {}
+    for exam in db_instance.get_exams(class_name, date_from, date_to):
+        by_class.setdefault(exam[1], []).append(exam)
+    results = []
+    for exam_class, exams in by_class.items():
+        class_analytics = analytics.analyze_class(db_instance, exam_class, exams)
+        results.extend(class_analytics.exam_result(e[0]) for e in exams)
+    return results
+
+
+def render_combined_result_pdf(class_name, sheets, output_dir="output", filename=None):
+    # One document per class with every exam's result sheet in date order
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    filepath = os.path.join(output_dir, filename or f"Results_{class_name.replace(' ', '')}_{timestamp}.pdf")
+    pdf = PDF(class_name)
+    for data in sheets:
+        add_result_sheet(pdf, data)
+    pdf.output(filepath)
+    return os.path.abspath(filepath)
+
+
+def _build_tasks(sheets, output_dir, merge):
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    if merge:
+        by_class = {}
+        for data in sheets:
+            by_class.setdefault(data["class_name"], []).append(data)
+        return [(render_combined_result_pdf, (class_name, class_sheets, output_dir), len(class_sheets))
+                for class_name, class_sheets in by_class.items()]
+
+    tasks = []
+    for data in sheets:
+        # exam_id keeps names unique when a class repeats an exam name
+        filename = (f"Result_{data['class_name'].replace(' ', '')}_{data['exam_name'].replace(' ', '_')}"
+                    f"_{data['exam_id']}_{timestamp}.pdf")
+        tasks.append((render_exam_result_pdf, (data, output_dir, filename), 1))
+    return tasks
+
+
+# Workers are always spawned: forking the app process would copy Kivy and
+# the background job threads into the child, and the default differs per platform
+MP_START_METHOD = "spawn"
+
+
+def _run_in_pool(tasks, max_workers, on_done):
+    """Run tasks on a process pool. Returns the tasks it could not run because
+    the pool could not be started or broke; errors raised by a task propagate."""
+    try:
+        pool = ProcessPoolExecutor(max_workers=max_workers,
+                                   mp_context=multiprocessing.get_context(MP_START_METHOD))
+    except (NotImplementedError, OSError, ImportError, ValueError):
+        return tasks
+    with pool:
+        futures = {}
+        try:
+            for task in tasks:
+                futures[pool.submit(task[0], *task[1])] = task
+        except (NotImplementedError, OSError, ImportError, BrokenProcessPool):
+            # Worker processes could not be started
+            for future in futures:
+                future.cancel()
+            return tasks
+
+        unfinished = dict(futures)
+        try:
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    # A worker process died; whatever has not finished is left to the caller
+                    return [task for f, task in futures.items() if f in unfinished]
+                del unfinished[future]
+                on_done(result, futures[future][2])
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return []
+
+
+def _run_inline(tasks, on_done):
+    for fn, args, count in tasks:
+        on_done(fn(*args), count)
+
+
+def generate_batch_result_pdfs(db_instance, class_name=None, date_from=None, date_to=None,
+                               output_dir="output", merge=False, max_workers=None, progress_callback=None):
+    """Render result sheets for every exam of a class and/or date range (None = all).
+
+    Exam data is read up front and rendering is fanned out across a process
+    pool. With merge=True one combined document is written per class.
+    progress_callback(done, total) counts sheets and may raise to cancel.
+    Returns a dict with the files written, sheet count, seconds and sheets/sec.
+    """
+    sheets = collect_exam_results(db_instance, class_name, date_from, date_to)
+    tasks = _build_tasks(sheets, output_dir, merge)
+    total = len(sheets)
+    files = []
+    done = 0
+
+    def on_done(path, count):
+        nonlocal done
+        files.append(path)
+        done += count
+        if progress_callback:
+            progress_callback(done, total)
+
+    start = time.perf_counter()
+    left = _run_in_pool(tasks, max_workers, on_done)
+    # Platforms without working multiprocessing (e.g. some Android builds)
+    # render in-process instead; sheets already written are not redone
+    _run_inline(left, on_done)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "files": files,
+        "sheets": total,
+        "seconds": elapsed,
+        "sheets_per_sec": total / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    from database import Database
+
+    parser = argparse.ArgumentParser(description="Generate result sheets for many exams at once.")
+    parser.add_argument("--db", default="coaching_center.db")
+    parser.add_argument("--class", dest="class_name", help="Only this class (default: all classes)")
+    parser.add_argument("--from", dest="date_from", help="First exam date, YYYY-MM-DD")
+    parser.add_argument("--to", dest="date_to", help="Last exam date, YYYY-MM-DD")
+    parser.add_argument("--output", default="output")
+    parser.add_argument("--merge", action="store_true", help="Write one combined PDF per class")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    db = Database(args.db, read_only=True)
+    result = generate_batch_result_pdfs(db, args.class_name, args.date_from, args.date_to,
+                                        args.output, args.merge, args.workers)
+    db.close()
+    print(f"{result['sheets']} sheets in {len(result['files'])} files, "
+          f"{result['seconds']:.2f}s ({result['sheets_per_sec']:.1f} sheets/sec)")
@@ -0,0 +1,5 @@
+"""Synthetic data generation and timing harness for the Database layer.
+
+    python -m benchmarks.datagen --db bench.db --students 100000 --exams-per-class 20
+    python -m benchmarks.harness --db bench.db --output bench_results.json --baseline baseline.json
+"""
@@ -0,0 +1,119 @@
+import argparse
+import datetime
+import os
+import random
+import time
+
+from database import MONTHS, Database
+
+FIRST_NAMES = ["Arif", "Nusrat", "Tanvir", "Farhana", "Rakib", "Sadia", "Imran", "Mim",
+               "Hasan", "Tania", "Sabbir", "Jannat", "Rifat", "Sumaiya", "Fahim", "Nabila"]
+LAST_NAMES = ["Ahmed", "Hossain", "Rahman", "Islam", "Khan", "Chowdhury", "Uddin", "Akter",
+              "Sarkar", "Mia", "Begum", "Karim"]
+
+CHUNK = 10000
+
+
+def _chunks(rows, size=CHUNK):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate(db_path, students=1000, exams_per_class=10, years=2, absent_rate=0.05, paid_rate=0.85, seed=42):
+    """Fill a fresh scratch database with deterministic synthetic data.
+
+    Students are spread round-robin across the seeded classes; every exam gets
+    a mark for each student of its class except a random absent_rate share, and
+    each student gets a payment row per month of the last `years` years with
+    probability paid_rate. Returns a dict of row counts.
+    """
+    if os.path.exists(db_path):
+        raise FileExistsError(f"{db_path} already exists; the generator only fills fresh files")
+
+    rng = random.Random(seed)
+    db = Database(db_path)
+    conn = db.conn
+    classes = [c[1] for c in db.get_classes()]
+    fees = {c[1]: c[2] for c in db.get_classes()}
+    counts = {"students": 0, "exams": 0, "marks": 0, "payments": 0}
+
+    def student_rows():
+        for n in range(1, students + 1):
+            first = rng.choice(FIRST_NAMES)
+            last = rng.choice(LAST_NAMES)
+            yield (n, f"STU{n:04d}", f"{first} {last}", f"{rng.choice(FIRST_NAMES)} {last}",
+                   f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                   f"01{rng.randint(300000000, 999999999)}", f"01{rng.randint(300000000, 999999999)}",
+                   classes[(n - 1) % len(classes)], rng.choice("ABC"))
+
+    for batch in _chunks(student_rows()):
+        with conn:
+            conn.executemany("""
+                INSERT INTO Students (id, unique_student_id, name, father_name, mother_name,
+                                      father_mobile, alternative_mobile, current_class, section)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, batch)
+        counts["students"] += len(batch)
+
+    members = {c: [f"STU{n:04d}" for n in range(i + 1, students + 1, len(classes))] for i, c in enumerate(classes)}
+    this_year = datetime.date.today().year
+
+    for class_name in classes:
+        exam_ids = []
+        with conn:
+            for k in range(exams_per_class):
+                exam_date = datetime.date(this_year, 1, 1) + datetime.timedelta(days=7 * k)
+                cur = conn.execute("INSERT INTO Exams (class_name, exam_name, total_marks, exam_date) VALUES (?, ?, ?, ?)",
+                                   (class_name, f"Weekly Test {k + 1}", 100.0, exam_date.isoformat()))
+                exam_ids.append(cur.lastrowid)
+        counts["exams"] += len(exam_ids)
+
+        def mark_rows():
+            for exam_id in exam_ids:
+                for std_id in members[class_name]:
+                    if rng.random() >= absent_rate:
+                        yield (std_id, exam_id, float(rng.randint(20, 100)))
+
+        for batch in _chunks(mark_rows()):
+            with conn:
+                conn.executemany("INSERT INTO Marks (student_unique_id, exam_id, obtained_marks) VALUES (?, ?, ?)", batch)
+            counts["marks"] += len(batch)
+
+        def payment_rows():
+            for std_id in members[class_name]:
+                for year in range(this_year - years + 1, this_year + 1):
+                    for month in MONTHS:
+                        if rng.random() < paid_rate:
+                            yield (std_id, class_name, month, str(year), fees[class_name], "paid")
+
+        for batch in _chunks(payment_rows()):
+            with conn:
+                conn.executemany("""
+                    INSERT INTO Payments (student_unique_id, class_name, month, year, amount, paid_status)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, batch)
+            counts["payments"] += len(batch)
+
+    conn.execute("ANALYZE")
+    db.close()
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic coaching center database.")
+    parser.add_argument("--db", default="bench.db")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--exams-per-class", type=int, default=10)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = generate(args.db, args.students, args.exams_per_class, args.years, seed=args.seed)
+    print(", ".join(f"{v} {k}" for k, v in counts.items()) + f" in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,320 @@
+import argparse
+import datetime
+import json
+import platform
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+from database import Database
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _row_count(result):
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    return 1
+
+
+def time_case(fn, repeat):
+    """Run fn() repeat times; returns timing stats in milliseconds and rows/sec."""
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+        rows += _row_count(result)
+    timings.sort()
+    total = sum(timings)
+    return {
+        "runs": repeat,
+        "p50_ms": percentile(timings, 0.50) * 1000,
+        "p95_ms": percentile(timings, 0.95) * 1000,
+        "mean_ms": total / repeat * 1000,
+        "rows": rows,
+        "rows_per_sec": rows / total if total > 0 else 0.0,
+    }
+
+
+# --- Screen data-loading paths (the Database calls each screen's on_enter makes) ---
+def load_batch_list(db):
+    return db.get_classes()
+
+
+def load_class_management(db, class_name):
+    return db.get_students_by_class(class_name)
+
+
+def load_marks_entry(db, exam_id):
+    db.get_exam(exam_id)
+    return db.get_marks_by_exam(exam_id)
+
+
+def load_student_detail(db, std_id):
+    profile = db.get_student_profile(std_id)
+    return profile.marks + profile.payments
+
+
+def load_payment(db, std_id):
+    return db.get_student_profile(std_id).payments
+
+
+def load_reports(db):
+    return db.get_dashboard_stats()
+
+
+def build_cases(db, rng):
+    """Benchmark cases as (name, callable). Sample keys are drawn from the data.
+
+    Writes that take a student together with an exam or class use a student
+    of that class, so they do the same work the app does.
+    """
+    classes = [c[1] for c in db.get_classes()]
+    fees = {c[1]: c[2] for c in db.get_classes()}
+    students = [r[0] for r in db.conn.execute("SELECT unique_student_id FROM Students ORDER BY id").fetchall()]
+    exams = [r[0] for r in db.conn.execute("SELECT exam_id FROM Exams ORDER BY exam_id").fetchall()]
+    if not students or not exams:
+        raise ValueError("benchmark database has no students or exams; run benchmarks.datagen first")
+    class_students = {}
+    for std_id, class_name in db.conn.execute(
+            "SELECT unique_student_id, current_class FROM Students WHERE status = 'active' ORDER BY id"):
+        class_students.setdefault(class_name, []).append(std_id)
+    class_exams = [r for r in db.conn.execute("SELECT exam_id, class_name FROM Exams ORDER BY exam_id")
+                   if r[1] in class_students]
+    if not class_exams:
+        raise ValueError("benchmark database has no exam with active students in its class")
+
+    pick_student = lambda: rng.choice(students)
+    pick_class = lambda: rng.choice(classes)
+    pick_exam = lambda: rng.choice(exams)
+    year = str(datetime.date.today().year)
+
+    def pick_enrolled():
+        # (student, class) of an active student
+        class_name = rng.choice(list(class_students))
+        return rng.choice(class_students[class_name]), class_name
+
+    def pick_sitting():
+        # (student, exam) where the student is in the exam's class
+        exam_id, class_name = rng.choice(class_exams)
+        return rng.choice(class_students[class_name]), exam_id
+
+    def detail_of(std_id):
+        return db.get_student_by_id(std_id)
+
+    def update_student():
+        s = detail_of(pick_student())
+        db.update_student(s[1], s[2], s[3], s[4], s[5], s[6], s[7], s[8])
+
+    def save_marks_bulk():
+        exam = db.get_exam(pick_exam())
+        rows = db.get_marks_by_exam(exam[0])
+        return db.save_marks_bulk(exam[0], {r[0]: float(rng.randint(20, 100)) for r in rows})
+
+    def add_and_delete_exam():
+        exam_id = db.add_exam(pick_class(), "Bench Exam", 100.0, f"{year}-12-31")
+        db.delete_exam(exam_id)
+
+    def add_and_delete_student():
+        std_id = db.add_student("Bench Student", "", "", "0100000000", "", pick_class(), "A")
+        db.delete_student(std_id)
+
+    def promote_and_back():
+        std_id, class_name = pick_enrolled()
+        db.promote_student(std_id, "Bench Class", "benchmark")
+        db.promote_student(std_id, class_name, "benchmark")
+
+    def update_class_fee():
+        # Rewrites the current fee, so repeated runs leave the fees as they were
+        class_name = pick_class()
+        db.update_class_fee(class_name, fees[class_name])
+
+    def add_or_update_mark():
+        std_id, exam_id = pick_sitting()
+        db.add_or_update_mark(std_id, exam_id, 50.0)
+
+    def add_payment():
+        std_id, class_name = pick_enrolled()
+        db.add_payment(std_id, class_name, "December", year, fees[class_name])
+
+    return [
+        # Reads
+        ("verify_admin", lambda: db.verify_admin("admin")),
+        ("generate_student_id", db.generate_student_id),
+        ("get_students_by_class", lambda: db.get_students_by_class(pick_class())),
+        ("get_student_by_id", lambda: db.get_student_by_id(pick_student())),
+        ("get_student_profile", lambda: db.get_student_profile(pick_student())),
+        ("search_students", lambda: db.search_students(detail_of(pick_student())[2][:3])),
+        ("get_classes", db.get_classes),
+        ("get_class_fee", lambda: db.get_class_fee(pick_class())),
+        ("get_exam", lambda: db.get_exam(pick_exam())),
+        ("get_exams_by_class", lambda: db.get_exams_by_class(pick_class())),
+        ("get_exams", lambda: db.get_exams(pick_class())),
+        ("get_marks_for_student", lambda: db.get_marks_for_student(pick_student())),
+        ("get_marks_by_exam", lambda: db.get_marks_by_exam(pick_exam())),
+        ("get_highest_marks_for_exam", lambda: db.get_highest_marks_for_exam(pick_exam())),
+        ("get_average_marks_for_exam", lambda: db.get_average_marks_for_exam(pick_exam())),
+        ("get_student_exam_stats", lambda: db.get_student_exam_stats(pick_student(), pick_class())),
+        ("get_payments_for_student", lambda: db.get_payments_for_student(pick_student())),
+        ("get_promotion_history", lambda: db.get_promotion_history(pick_student())),
+        ("get_promotion_sequence", db.get_promotion_sequence),
+        ("promote_all_classes_dry_run", lambda: db.promote_all_classes(dry_run=True)),
+        ("get_total_students", db.get_total_students),
+        ("get_total_batches", db.get_total_batches),
+        ("get_total_exams", db.get_total_exams),
+        ("get_total_revenue", db.get_total_revenue),
+        ("get_total_payments", db.get_total_payments),
+        ("get_dashboard_stats", db.get_dashboard_stats),
+        ("get_defaulters", lambda: db.get_defaulters(None, f"{int(year) - 1}-01", f"{year}-12")),
+        ("get_dues_ledger", lambda: db.get_dues_ledger(pick_class(), f"{year}-01", f"{year}-12")),
+        ("get_monthly_revenue", lambda: db.get_monthly_revenue(f"{int(year) - 1}-01", f"{year}-12")),
+        ("get_yearly_revenue", db.get_yearly_revenue),
+        ("get_class_revenue", lambda: db.get_class_revenue(f"{year}-01", f"{year}-12")),
+        # Writes
+        ("update_admin_password", lambda: db.update_admin_password("admin")),
+        ("add_student+delete_student", add_and_delete_student),
+        ("update_student", update_student),
+        ("update_class_fee", update_class_fee),
+        ("add_exam+delete_exam", add_and_delete_exam),
+        ("add_or_update_mark", add_or_update_mark),
+        ("save_marks_bulk", save_marks_bulk),
+        ("add_payment", add_payment),
+        ("promote_student", promote_and_back),
+        ("rebuild_stats", db.rebuild_stats),
+        # Screen data-loading paths
+        ("screen:batch_list", lambda: load_batch_list(db)),
+        ("screen:class_management", lambda: load_class_management(db, pick_class())),
+        ("screen:marks_entry", lambda: load_marks_entry(db, pick_exam())),
+        ("screen:student_detail", lambda: load_student_detail(db, pick_student())),
+        ("screen:payment", lambda: load_payment(db, pick_student())),
+        ("screen:reports", lambda: load_reports(db)),
+    ]
+
+
+def pdf_case(db, rng):
+    try:
+        from pdf_generator import fetch_exam_result_data, render_exam_result_pdf
+    except ImportError:
+        return None
+    exams = [r[0] for r in db.conn.execute("SELECT exam_id FROM Exams").fetchall()]
+    output_dir = tempfile.mkdtemp(prefix="bench_pdf_")
+
+    def run():
+        # Same steps as generate_exam_result_pdf, keeping the rows for rows/sec
+        data = fetch_exam_result_data(rng.choice(exams), db)
+        render_exam_result_pdf(data, output_dir)
+        return data["students_marks"]
+
+    return ("generate_exam_result_pdf", run)
+
+
+def working_copy(db_path, directory):
+    """Copy db_path (including anything still in its WAL) into directory."""
+    path = os.path.join(directory, os.path.basename(db_path))
+    source = sqlite3.connect(db_path)
+    target = sqlite3.connect(path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    return path
+
+
+def run_benchmarks(db_path, repeat=20, pdf_repeat=3, seed=1, only=None):
+    # The write cases change the data, so they run on a throwaway copy; the
+    # database given stays the same from one run to the next
+    work_dir = tempfile.mkdtemp(prefix="bench_db_")
+    try:
+        return _run_benchmarks(db_path, working_copy(db_path, work_dir), repeat, pdf_repeat, seed, only)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _run_benchmarks(db_path, work_path, repeat, pdf_repeat, seed, only):
+    rng = random.Random(seed)
+    db = Database(work_path)
+    cases = build_cases(db, rng)
+    pdf = pdf_case(db, rng)
+    if pdf:
+        cases.append(pdf)
+
+    results = {}
+    for name, fn in cases:
+        if only and only not in name:
+            continue
+        results[name] = time_case(fn, pdf_repeat if pdf and fn is pdf[1] else repeat)
+    counts = {t: db.conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+              for t in ("Students", "Exams", "Marks", "Payments")}
+    db.close()
+    return {
+        "meta": {
+            "db": db_path,
+            "rows": counts,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=0.2):
+    """Cases whose p50 grew by more than threshold (fraction) over the baseline."""
+    regressions = []
+    for name, stats in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or base["p50_ms"] <= 0:
+            continue
+        ratio = stats["p50_ms"] / base["p50_ms"]
+        if ratio > 1 + threshold:
+            regressions.append((name, base["p50_ms"], stats["p50_ms"], ratio))
+    return regressions
+
+
+def print_report(report):
+    print(f"{'case':40} {'p50 ms':>10} {'p95 ms':>10} {'rows/s':>12}")
+    for name, stats in report["results"].items():
+        print(f"{name:40} {stats['p50_ms']:10.3f} {stats['p95_ms']:10.3f} {stats['rows_per_sec']:12.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the Database layer against a generated database.")
+    parser.add_argument("--db", default="bench.db")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--pdf-repeat", type=int, default=3)
+    parser.add_argument("--only", help="Only run cases whose name contains this text")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p50 slowdown, as a fraction")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.db, args.repeat, args.pdf_repeat, only=args.only)
+    print_report(report)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for name, before, after, ratio in regressions:
+            print(f"REGRESSION {name}: {before:.3f} ms -> {after:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
@@ -1,15 +1,445 @@
+import re
 import sqlite3
+import collections
 import datetime
+import pathlib
+import threading
+
+import query_stats
+
+# Payments.month holds the English month name
+MONTHS = ["January", "February", "March", "April", "May", "June", "July",
+          "August", "September", "October", "November", "December"]
+
+# Class given to students who finish the top class; they also get status
+# 'graduated', so they drop out of everything that counts active students
+GRADUATED = "Graduated"
+
+PROMOTION_HISTORY_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS PromotionHistory (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_unique_id TEXT,
+        year TEXT,
+        from_class TEXT,
+        to_class TEXT,
+        overall_result_summary TEXT,
+        FOREIGN KEY (student_unique_id) REFERENCES Students(unique_student_id) ON DELETE CASCADE
+    )
+'''
+
+
+def _normalize_promotion_history(cursor):
+    cursor.execute("PRAGMA table_info(PromotionHistory)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if "from_class" in columns:
+        return
+    cursor.execute("ALTER TABLE PromotionHistory RENAME TO PromotionHistory_legacy")
+    cursor.execute(PROMOTION_HISTORY_SCHEMA)
+    cursor.execute("""
+        INSERT INTO PromotionHistory (id, student_unique_id, year, from_class, to_class, overall_result_summary)
+        SELECT history_id, student_unique_id, year, old_class, new_class, overall_result_summary
+        FROM PromotionHistory_legacy
+    """)
+    cursor.execute("DROP TABLE PromotionHistory_legacy")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_promotion_student ON PromotionHistory(student_unique_id, year)")
+
+
+def _create_student_search_index(cursor):
+    # FTS5 index over the columns the front desk searches by, kept in sync
+    # with Students through triggers (external content table, rowid = id)
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS StudentSearch USING fts5(
+                unique_student_id, name, father_name, mother_name, father_mobile, alternative_mobile,
+                content='Students', content_rowid='id', prefix='2 3'
+            )
+        """)
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5; search_students falls back to LIKE
+        return
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS students_search_ai AFTER INSERT ON Students BEGIN
+            INSERT INTO StudentSearch (rowid, unique_student_id, name, father_name, mother_name, father_mobile, alternative_mobile)
+            VALUES (new.id, new.unique_student_id, new.name, new.father_name, new.mother_name, new.father_mobile, new.alternative_mobile);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS students_search_ad AFTER DELETE ON Students BEGIN
+            INSERT INTO StudentSearch (StudentSearch, rowid, unique_student_id, name, father_name, mother_name, father_mobile, alternative_mobile)
+            VALUES ('delete', old.id, old.unique_student_id, old.name, old.father_name, old.mother_name, old.father_mobile, old.alternative_mobile);
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS students_search_au AFTER UPDATE ON Students BEGIN
+            INSERT INTO StudentSearch (StudentSearch, rowid, unique_student_id, name, father_name, mother_name, father_mobile, alternative_mobile)
+            VALUES ('delete', old.id, old.unique_student_id, old.name, old.father_name, old.mother_name, old.father_mobile, old.alternative_mobile);
+            INSERT INTO StudentSearch (rowid, unique_student_id, name, father_name, mother_name, father_mobile, alternative_mobile)
+            VALUES (new.id, new.unique_student_id, new.name, new.father_name, new.mother_name, new.father_mobile, new.alternative_mobile);
+        END
+    """)
+    cursor.execute("INSERT INTO StudentSearch (StudentSearch) VALUES ('rebuild')")
+
+
+def _rebuild_stats(cursor):
+    # Recompute the trigger-maintained counters from the base tables
+    cursor.execute("""
+        INSERT OR REPLACE INTO SummaryStats (id, total_students, total_batches, total_exams)
+        VALUES (1,
+                (SELECT COUNT(*) FROM Students WHERE status = 'active'),
+                (SELECT COUNT(*) FROM Classes),
+                (SELECT COUNT(*) FROM Exams))
+    """)
+
+
+def _period_sql(year, month):
+    # YYYYMM from Payments' text year and month name. A month that is not a
+    # month name (in any case) gets month 00: the payment still counts toward
+    # its year's revenue but toward no month
+    return (f"CAST({year} AS INTEGER) * 100 + COALESCE(CASE lower(trim({month})) "
+            + " ".join(f"WHEN '{m.lower()}' THEN {i}" for i, m in enumerate(MONTHS, start=1)) + " END, 0)")
+
+
+def _add_payment_period(cursor):
+    cursor.execute("PRAGMA table_info(Payments)")
+    if "period" not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE Payments ADD COLUMN period INTEGER")
+    cursor.execute(f"UPDATE Payments SET period = {_period_sql('year', 'month')}")
+
+
+def _rebuild_monthly_revenue(cursor):
+    cursor.execute("DELETE FROM MonthlyRevenueStats")
+    cursor.execute("""
+        INSERT INTO MonthlyRevenueStats (class_name, period, revenue, payment_count)
+        SELECT class_name, period, SUM(amount), COUNT(*) FROM Payments
+        WHERE paid_status = 'paid'
+        GROUP BY class_name, period
+    """)
+
+
+def _create_revenue_triggers(cursor):
+    # Keep Payments.period and MonthlyRevenueStats in step with every write to
+    # Payments, including writers that only set year and month
+    new_period, old_period = _period_sql("new.year", "new.month"), _period_sql("old.year", "old.month")
+    for name in ("payments_period_ai", "payments_period_au", "stats_monthly_payments_ai",
+                 "stats_monthly_payments_ad", "stats_monthly_payments_au"):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+    cursor.execute(f"""
+        CREATE TRIGGER payments_period_ai AFTER INSERT ON Payments WHEN new.period IS NOT {new_period} BEGIN
+            UPDATE Payments SET period = {new_period} WHERE payment_id = new.payment_id;
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER payments_period_au AFTER UPDATE OF year, month ON Payments BEGIN
+            UPDATE Payments SET period = {new_period} WHERE payment_id = new.payment_id;
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER stats_monthly_payments_ai AFTER INSERT ON Payments WHEN new.paid_status = 'paid' BEGIN
+            INSERT INTO MonthlyRevenueStats (class_name, period, revenue, payment_count)
+            VALUES (new.class_name, {new_period}, new.amount, 1)
+            ON CONFLICT(class_name, period) DO UPDATE SET revenue = revenue + excluded.revenue, payment_count = payment_count + 1;
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER stats_monthly_payments_ad AFTER DELETE ON Payments WHEN old.paid_status = 'paid' BEGIN
+            UPDATE MonthlyRevenueStats SET revenue = revenue - old.amount, payment_count = payment_count - 1
+            WHERE class_name = old.class_name AND period = {old_period};
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER stats_monthly_payments_au AFTER UPDATE OF class_name, year, month, amount, paid_status ON Payments BEGIN
+            UPDATE MonthlyRevenueStats SET revenue = revenue - old.amount, payment_count = payment_count - 1
+            WHERE class_name = old.class_name AND period = {old_period} AND old.paid_status = 'paid';
+            INSERT INTO MonthlyRevenueStats (class_name, period, revenue, payment_count)
+            SELECT new.class_name, {new_period}, new.amount, 1 WHERE new.paid_status = 'paid'
+            ON CONFLICT(class_name, period) DO UPDATE SET revenue = revenue + excluded.revenue, payment_count = payment_count + 1;
+        END
+    """)
+
+
+# Schema migrations applied on top of the base tables from create_tables().
+# PRAGMA user_version stores the number of the last migration applied, so an
+# existing coaching_center.db is upgraded in place the next time it is opened.
+# Each entry is a list of SQL statements or callables taking the cursor.
+#
+# Until a release ships them, migrations are edited in place, so a new
+# database never creates schema only to drop it again. Data that builds
+# already out there wrote is fixed by a new migration instead, written so it
+# changes nothing on a fresh database (7 and 8).
+MIGRATIONS = [
+    # 1: indexes for the hot lookups. Duplicate marks/payments left behind by
+    # the old check-then-insert writes are collapsed before the unique indexes.
+    [
+        """
+        DELETE FROM Marks WHERE mark_id NOT IN (
+            SELECT MAX(mark_id) FROM Marks GROUP BY exam_id, student_unique_id
+        )
+        """,
+        """
+        DELETE FROM Payments WHERE payment_id NOT IN (
+            SELECT MAX(payment_id) FROM Payments GROUP BY student_unique_id, year, month
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_students_class_status ON Students(current_class, status)",
+        "CREATE INDEX IF NOT EXISTS idx_students_status ON Students(status)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_marks_exam_student ON Marks(exam_id, student_unique_id)",
+        "CREATE INDEX IF NOT EXISTS idx_marks_student ON Marks(student_unique_id)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_payments_student_period ON Payments(student_unique_id, year, month)",
+        "CREATE INDEX IF NOT EXISTS idx_promotion_student ON PromotionHistory(student_unique_id, year)",
+    ],
+    # 2: older builds created PromotionHistory with history_id/old_class/new_class
+    [
+        _normalize_promotion_history,
+    ],
+    # 3: full-text search over students
+    [
+        _create_student_search_index,
+    ],
+    # 4: summary counters for the reports/dashboard, kept current by triggers
+    [
+        """
+        CREATE TABLE IF NOT EXISTS SummaryStats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_students INTEGER NOT NULL DEFAULT 0,
+            total_batches INTEGER NOT NULL DEFAULT 0,
+            total_exams INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS stats_students_ai AFTER INSERT ON Students BEGIN
+            UPDATE SummaryStats SET total_students = total_students + (CASE WHEN new.status = 'active' THEN 1 ELSE 0 END) WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS stats_students_ad AFTER DELETE ON Students BEGIN
+            UPDATE SummaryStats SET total_students = total_students - (CASE WHEN old.status = 'active' THEN 1 ELSE 0 END) WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS stats_students_au AFTER UPDATE OF status ON Students BEGIN
+            UPDATE SummaryStats SET total_students = total_students
+                + (CASE WHEN new.status = 'active' THEN 1 ELSE 0 END)
+                - (CASE WHEN old.status = 'active' THEN 1 ELSE 0 END) WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS stats_classes_ai AFTER INSERT ON Classes BEGIN
+            UPDATE SummaryStats SET total_batches = total_batches + 1 WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS stats_classes_ad AFTER DELETE ON Classes BEGIN
+            UPDATE SummaryStats SET total_batches = total_batches - 1 WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS stats_exams_ai AFTER INSERT ON Exams BEGIN
+            UPDATE SummaryStats SET total_exams = total_exams + 1 WHERE id = 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS stats_exams_ad AFTER DELETE ON Exams BEGIN
+            UPDATE SummaryStats SET total_exams = total_exams - 1 WHERE id = 1;
+        END
+        """,
+        _rebuild_stats,
+    ],
+    # 5: exams of a class in date order, for keyset pagination and every
+    # by-class lookup
+    [
+        "CREATE INDEX IF NOT EXISTS idx_exams_class_date ON Exams(class_name, exam_date)",
+    ],
+    # 6: integer YYYYMM period on Payments (filled in by triggers for writers
+    # that only set year/month) and paid revenue per class and month
+    [
+        _add_payment_period,
+        "CREATE INDEX IF NOT EXISTS idx_payments_student_month ON Payments(student_unique_id, period)",
+        """
+        CREATE TABLE IF NOT EXISTS MonthlyRevenueStats (
+            class_name TEXT NOT NULL,
+            period INTEGER NOT NULL,
+            revenue REAL NOT NULL DEFAULT 0,
+            payment_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (class_name, period)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_monthly_revenue_period ON MonthlyRevenueStats(period)",
+        _create_revenue_triggers,
+        _rebuild_monthly_revenue,
+    ],
+    # 7: students promoted to Graduated used to stay 'active'
+    [
+        f"UPDATE Students SET status = 'graduated' WHERE current_class = '{GRADUATED}' AND status = 'active'",
+    ],
+    # 8: payments with an unknown month used to get a NULL period; recompute
+    # every period (month 00 of the year for those) and the rollup from them
+    [
+        _add_payment_period,
+        _rebuild_monthly_revenue,
+    ],
+]
+
+# Everything the student detail, edit and payment screens show for one student.
+# student is the Students row, exam_stats is (total, attended, missed) and the
+# lists hold the rows of the matching get_*_for_student / history methods.
+StudentProfile = collections.namedtuple(
+    "StudentProfile", "student class_fee exam_stats marks payments promotion_history")
+
+
+class _ReferenceCache:
+    # Classes rows (by class_id) and Exams rows keyed by exam_id (in class,
+    # date, exam_id order) of one database file; None until first read
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.classes = None
+        self.exams = None
+
+
+# One _ReferenceCache per database file, shared by every Database on it in this
+# process, so the app instance and its reader() instances see the same data.
+# Every in-memory database is a separate database, so each gets its own.
+_reference_caches = {}
+_reference_caches_lock = threading.Lock()
+
+
+def _reference_cache(db_name):
+    if db_name == ":memory:":
+        return _ReferenceCache()
+    key = str(pathlib.Path(db_name).resolve())
+    with _reference_caches_lock:
+        return _reference_caches.setdefault(key, _ReferenceCache())
+
 
 class Database:
-    def __init__(self, db_name="coaching_center.db"):
+    """SQLite data access for the app.
+
+    Connections are per thread: every thread that touches the same Database
+    gets its own sqlite3 connection and cursor, so background jobs never share
+    cursor state with the UI thread. The file runs in WAL mode, so readers
+    (including read-only instances from reader()) are not blocked by writes.
+
+    Student profiles are cached (least recently used first out) and dropped by
+    the write methods that change them, so moving between the detail, edit and
+    payment screens does not hit the database again. Classes and exam headers
+    are small and rarely written, so they are read once into a cache shared by
+    all instances on the file and reloaded after the write methods here change
+    them; call invalidate_reference() after changing the file any other way.
+
+    Threads other than the UI thread should call release_thread_connection()
+    when they are done (BackgroundJob does this through its exit hooks). An
+    in-memory database (":memory:") exists only inside its connection, so
+    every thread shares a single connection for it instead.
+    """
+
+    # PRAGMA cache_size for every connection, in KiB
+    cache_size_kib = 8192
+    # Number of StudentProfile objects kept in memory
+    profile_cache_size = 64
+
+    def __init__(self, db_name="coaching_center.db", read_only=False):
         self.db_name = db_name
-        self.conn = sqlite3.connect(self.db_name)
-        # Enable foreign key support
-        self.conn.execute("PRAGMA foreign_keys = ON")
-        self.cursor = self.conn.cursor()
+        self.read_only = read_only
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._profiles = collections.OrderedDict()
+        self._profiles_generation = 0
+        self._profiles_lock = threading.Lock()
+        self._reference = _reference_cache(db_name)
+        if read_only:
+            # The schema is assumed to be set up by a writable instance already
+            self.has_student_search = self._table_exists("StudentSearch")
+            return
         self.create_tables()
 
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    @property
+    def cursor(self):
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._local.cursor = self.conn.cursor(query_stats.cursor_class())
+        return cursor
+
+    def reset_cursor(self):
+        # Drop this thread's cursor so the next query uses the current
+        # query_stats setting (plain or instrumented cursor)
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is not None:
+            cursor.close()
+            self._local.cursor = None
+
+    @property
+    def in_memory(self):
+        return self.db_name == ":memory:"
+
+    def _connect(self):
+        # check_same_thread is off only so close() can close every thread's
+        # connection; each connection is still used by its own thread alone,
+        # except the one shared connection of an in-memory database
+        if self.in_memory:
+            with self._lock:
+                if self._connections:
+                    return self._connections[0]
+        if self.read_only:
+            uri = pathlib.Path(self.db_name).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_name, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        # Enable foreign key support
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute(f"PRAGMA cache_size = -{self.cache_size_kib}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def release_thread_connection(self):
+        """Close the calling thread's cursor and connection. The thread opens
+        a new connection if it queries again."""
+        cursor = getattr(self._local, "cursor", None)
+        conn = getattr(self._local, "conn", None)
+        self._local.cursor = None
+        self._local.conn = None
+        if cursor is not None:
+            cursor.close()
+        if conn is None or self.in_memory:
+            return
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+
+    def reader(self):
+        # A read-only instance on the same file, for reporting and export work
+        return Database(self.db_name, read_only=True)
+
+    def iter_query(self, sql, params=(), batch_size=500):
+        """Yield result rows in fetchmany batches from a private cursor, for
+        streaming large results without building a list."""
+        cursor = self.conn.cursor(query_stats.cursor_class())
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+    def _table_exists(self, name):
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,))
+        return self.cursor.fetchone() is not None
+
     def create_tables(self):
         # 1. Students Table
         self.cursor.execute("""
@@ -74,17 +504,7 @@ class Database:
         """)
 
         # 6. PromotionHistory Table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS PromotionHistory (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                student_unique_id TEXT,
-                year TEXT,
-                from_class TEXT,
-                to_class TEXT,
-                overall_result_summary TEXT,
-                FOREIGN KEY (student_unique_id) REFERENCES Students(unique_student_id) ON DELETE CASCADE
-            )
-        ''')
+        self.cursor.execute(PROMOTION_HISTORY_SCHEMA)
         
         # 7. AppConfig Table
         self.cursor.execute('''
@@ -95,8 +515,34 @@ class Database:
         ''')
 
         self.conn.commit()
+        self.migrate()
+        self.has_student_search = self._table_exists("StudentSearch")
         self._seed_default_classes()
         self._seed_default_admin()
+        # The file may have been replaced (restore) or just seeded
+        self.invalidate_reference()
+
+    def get_schema_version(self):
+        self.cursor.execute("PRAGMA user_version")
+        return self.cursor.fetchone()[0]
+
+    def migrate(self):
+        # Each migration runs in its own transaction together with the
+        # user_version bump, so a failure leaves the file at the last good version.
+        version = self.get_schema_version()
+        for target, steps in enumerate(MIGRATIONS[version:], start=version + 1):
+            try:
+                self.cursor.execute("BEGIN")
+                for step in steps:
+                    if callable(step):
+                        step(self.cursor)
+                    else:
+                        self.cursor.execute(step)
+                self.cursor.execute(f"PRAGMA user_version = {target}")
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
 
     def _seed_default_classes(self):
         self.cursor.execute("SELECT COUNT(*) FROM Classes")
@@ -124,55 +570,256 @@ class Database:
         self.cursor.execute("UPDATE AppConfig SET value = ? WHERE key = 'admin_password'", (new_password,))
         self.conn.commit()
 
+    def get_setting(self, key, default=None):
+        self.cursor.execute("SELECT value FROM AppConfig WHERE key = ?", (key,))
+        row = self.cursor.fetchone()
+        return row[0] if row else default
+
+    def set_setting(self, key, value):
+        self.cursor.execute("INSERT OR REPLACE INTO AppConfig (key, value) VALUES (?, ?)", (key, str(value)))
+        self.conn.commit()
+
     # --- Student Operations ---
+    def _next_student_number(self):
+        # Highest of the reserved-ID counter and the Students AUTOINCREMENT
+        # high-water mark, so rows inserted by older builds are never reused
+        self.cursor.execute("SELECT value FROM AppConfig WHERE key = 'next_student_number'")
+        row = self.cursor.fetchone()
+        reserved = int(row[0]) if row else 1
+        self.cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'Students'")
+        row = self.cursor.fetchone()
+        return max(reserved, row[0] + 1 if row else 1)
+
+    def _reserve_student_ids(self, count):
+        # Must run inside a write transaction (BEGIN IMMEDIATE)
+        first = self._next_student_number()
+        self.cursor.execute("INSERT OR REPLACE INTO AppConfig (key, value) VALUES ('next_student_number', ?)",
+                            (str(first + count),))
+        return [f"STU{n:04d}" for n in range(first, first + count)]
+
     def generate_student_id(self):
-        self.cursor.execute("SELECT id FROM Students ORDER BY id DESC LIMIT 1")
-        result = self.cursor.fetchone()
-        next_id = 1 if result is None else result[0] + 1
-        return f"STU{next_id:04d}"
+        # The ID the next add_student call will receive (nothing is reserved)
+        return f"STU{self._next_student_number():04d}"
 
     def add_student(self, name, father_name, mother_name, father_mobile, alternative_mobile, current_class, section):
-        student_id = self.generate_student_id()
-        self.cursor.execute("""
-            INSERT INTO Students (unique_student_id, name, father_name, mother_name, father_mobile, alternative_mobile, current_class, section)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, (student_id, name, father_name, mother_name, father_mobile, alternative_mobile, current_class, section))
-        self.conn.commit()
-        return student_id
+        return self.add_students_bulk([(name, father_name, mother_name, father_mobile, alternative_mobile, current_class, section)])[0]
+
+    def add_students_bulk(self, rows):
+        """Insert (name, father_name, mother_name, father_mobile, alternative_mobile, current_class, section) rows.
+
+        IDs are reserved and the rows inserted in one write transaction, so
+        concurrent writers can never hand out the same ID. Returns the new IDs.
+        """
+        if not rows:
+            return []
+        self.cursor.execute("BEGIN IMMEDIATE")
+        try:
+            ids = self._reserve_student_ids(len(rows))
+            self.cursor.executemany("""
+                INSERT INTO Students (unique_student_id, name, father_name, mother_name, father_mobile, alternative_mobile, current_class, section)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, [(std_id,) + tuple(row) for std_id, row in zip(ids, rows)])
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        return ids
+
+    def _page(self, table, where, params, keys, limit, after, descending=False):
+        """One keyset page of `SELECT * FROM table WHERE where`, ordered by keys.
+
+        after is the token from the previous page (None for the first). Returns
+        (rows, token) where token is None once there are no more rows. The keys
+        must be unique together and backed by an index for this to stay cheap.
+        """
+        key_columns = [column for column, _ in keys]
+        if after is not None:
+            op = "<" if descending else ">"
+            where += f" AND ({', '.join(key_columns)}) {op} ({', '.join('?' * len(keys))})"
+            params = list(params) + list(after)
+        order = ", ".join(f"{column} {'DESC' if descending else 'ASC'}" for column in key_columns)
+        self.cursor.execute(f"SELECT * FROM {table} WHERE {where} ORDER BY {order} LIMIT ?",
+                            list(params) + [limit + 1])
+        rows = self.cursor.fetchall()
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, tuple(rows[-1][position] for _, position in keys)
 
     def get_students_by_class(self, class_name):
         self.cursor.execute("SELECT * FROM Students WHERE current_class = ? AND status = 'active'", (class_name,))
         return self.cursor.fetchall()
 
+    def get_students_by_class_page(self, class_name, limit=50, after=None):
+        # In id order, straight off idx_students_class_status
+        return self._page("Students", "current_class = ? AND status = 'active'", [class_name],
+                          [("id", 0)], limit, after)
+
     def get_student_by_id(self, student_unique_id):
         self.cursor.execute("SELECT * FROM Students WHERE unique_student_id = ?", (student_unique_id,))
         return self.cursor.fetchone()
 
+    def get_student_profile(self, student_unique_id):
+        """The StudentProfile for a student (None if unknown), from the cache when possible."""
+        with self._profiles_lock:
+            profile = self._profiles.get(student_unique_id)
+            if profile is not None:
+                self._profiles.move_to_end(student_unique_id)
+                return profile
+            generation = self._profiles_generation
+
+        profile = self._load_student_profile(student_unique_id)
+        if profile is None:
+            return None
+        with self._profiles_lock:
+            # Skip caching if a write invalidated profiles while this one loaded
+            if generation == self._profiles_generation:
+                self._profiles[student_unique_id] = profile
+                while len(self._profiles) > self.profile_cache_size:
+                    self._profiles.popitem(last=False)
+        return profile
+
+    def _load_student_profile(self, student_unique_id):
+        # All parts are read in one transaction, so they come from the same snapshot
+        own_transaction = not self.conn.in_transaction
+        if own_transaction:
+            self.cursor.execute("BEGIN")
+        try:
+            student = self.get_student_by_id(student_unique_id)
+            if not student:
+                return None
+            return StudentProfile(
+                student=student,
+                class_fee=self.get_class_fee(student[7]),
+                exam_stats=self.get_student_exam_stats(student_unique_id, student[7]),
+                marks=self.get_marks_for_student(student_unique_id),
+                payments=self.get_payments_for_student(student_unique_id),
+                promotion_history=self.get_promotion_history(student_unique_id),
+            )
+        finally:
+            if own_transaction:
+                self.conn.commit()
+
+    def invalidate_profiles(self, student_ids=None, class_name=None):
+        """Drop cached profiles of the given students and/or of everyone in class_name.
+
+        With no arguments the whole cache is cleared.
+        """
+        with self._profiles_lock:
+            self._profiles_generation += 1
+            if student_ids is None and class_name is None:
+                self._profiles.clear()
+                return
+            for std_id in student_ids or ():
+                self._profiles.pop(std_id, None)
+            if class_name is not None:
+                for std_id, profile in list(self._profiles.items()):
+                    if profile.student[7] == class_name:
+                        del self._profiles[std_id]
+
+    def _reference_data(self, name, load):
+        cache = self._reference
+        with cache.lock:
+            value = getattr(cache, name)
+            if value is not None:
+                return value
+            generation = cache.generation
+        value = load()
+        with cache.lock:
+            # Not stored if a write invalidated the cache while this was loading
+            if generation == cache.generation:
+                setattr(cache, name, value)
+        return value
+
+    def invalidate_reference(self, classes=True, exams=True):
+        """Drop the cached Classes and/or Exams rows of this database file."""
+        cache = self._reference
+        with cache.lock:
+            cache.generation += 1
+            if classes:
+                cache.classes = None
+            if exams:
+                cache.exams = None
+
+    def search_students(self, prefix, limit=20, include_inactive=False):
+        # Every word typed must prefix-match one of the indexed columns;
+        # graduated and other inactive students only with include_inactive
+        status_clause = "" if include_inactive else "AND s.status = 'active'"
+        terms = [t for t in re.split(r"\W+", prefix) if t]
+        if not terms:
+            return []
+        if self.has_student_search:
+            query = " ".join(f'"{t}"*' for t in terms)
+            self.cursor.execute(f"""
+                SELECT s.* FROM StudentSearch
+                JOIN Students s ON s.id = StudentSearch.rowid
+                WHERE StudentSearch MATCH ? {status_clause}
+                ORDER BY bm25(StudentSearch, 10.0, 5.0, 2.0, 2.0, 3.0, 3.0)
+                LIMIT ?
+            """, (query, limit))
+            return self.cursor.fetchall()
+
+        columns = ("unique_student_id", "name", "father_name", "mother_name", "father_mobile", "alternative_mobile")
+        term_clause = "(" + " OR ".join(f"{c} LIKE ?" for c in columns) + ")"
+        params = []
+        for t in terms:
+            params.extend([f"{t}%"] * len(columns))
+        self.cursor.execute(f"SELECT * FROM Students s WHERE {' AND '.join([term_clause] * len(terms))} "
+                            f"{status_clause} LIMIT ?", params + [limit])
+        return self.cursor.fetchall()
+
     def update_student(self, student_unique_id, name, father_name, mother_name, father_mobile, alternative_mobile, current_class, section):
         self.cursor.execute("""
             UPDATE Students 
-            SET name=?, father_name=?, mother_name=?, father_mobile=?, alternative_mobile=?, current_class=?, section=?
+            SET name=?, father_name=?, mother_name=?, father_mobile=?, alternative_mobile=?, current_class=?, section=?,
+                status = CASE WHEN ? = ? THEN 'graduated' WHEN status = 'graduated' THEN 'active' ELSE status END
             WHERE unique_student_id=?
-        """, (name, father_name, mother_name, father_mobile, alternative_mobile, current_class, section, student_unique_id))
+        """, (name, father_name, mother_name, father_mobile, alternative_mobile, current_class, section,
+              current_class, GRADUATED, student_unique_id))
         self.conn.commit()
+        self.invalidate_profiles([student_unique_id])
 
     def delete_student(self, student_unique_id):
         self.cursor.execute("DELETE FROM Students WHERE unique_student_id = ?", (student_unique_id,))
         self.conn.commit()
+        self.invalidate_profiles([student_unique_id])
 
     # --- Class Operations ---
+    def _load_classes(self):
+        self.cursor.execute("SELECT * FROM Classes ORDER BY class_id")
+        return tuple(self.cursor.fetchall())
+
     def get_classes(self):
-        self.cursor.execute("SELECT * FROM Classes")
-        return self.cursor.fetchall()
+        return list(self._reference_data("classes", self._load_classes))
+
+    def get_classes_page(self, limit=50, after=None):
+        # Same (rows, token) pages as _page, sliced from the cached classes
+        rows = [c for c in self._reference_data("classes", self._load_classes) if after is None or c[0] > after[0]]
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, (rows[-1][0],)
 
     def get_class_fee(self, class_name):
-        self.cursor.execute("SELECT monthly_fee FROM Classes WHERE class_name = ?", (class_name,))
-        result = self.cursor.fetchone()
-        return result[0] if result else 0.0
+        for c in self._reference_data("classes", self._load_classes):
+            if c[1] == class_name:
+                return c[2]
+        return 0.0
 
     def update_class_fee(self, class_name, fee):
-        self.cursor.execute("UPDATE Classes SET monthly_fee = ? WHERE class_name = ?", (fee, class_name))
-        self.conn.commit()
+        self.update_class_fees({class_name: fee})
+
+    def update_class_fees(self, fees_by_class):
+        """Set the monthly fee of several classes in one transaction. Returns the number of classes given."""
+        rows = [(fee, class_name) for class_name, fee in fees_by_class.items()]
+        if not rows:
+            return 0
+        with self.conn:
+            self.cursor.executemany("UPDATE Classes SET monthly_fee = ? WHERE class_name = ?", rows)
+        self.invalidate_reference(exams=False)
+        for class_name in fees_by_class:
+            self.invalidate_profiles(class_name=class_name)
+        return len(rows)
 
     # --- Exam Operations ---
     def add_exam(self, class_name, exam_name, total_marks, exam_date):
@@ -181,27 +828,67 @@ class Database:
             VALUES (?, ?, ?, ?)
         """, (class_name, exam_name, total_marks, exam_date))
         self.conn.commit()
-        return self.cursor.lastrowid
+        exam_id = self.cursor.lastrowid
+        self.invalidate_reference(classes=False)
+        self.invalidate_profiles(class_name=class_name)
+        return exam_id
+
+    def _load_exams(self):
+        self.cursor.execute("SELECT * FROM Exams ORDER BY class_name, exam_date, exam_id")
+        return {e[0]: e for e in self.cursor.fetchall()}
+
+    def get_exam(self, exam_id):
+        return self._reference_data("exams", self._load_exams).get(exam_id)
 
     def get_exams_by_class(self, class_name):
-        self.cursor.execute("SELECT * FROM Exams WHERE class_name = ?", (class_name,))
-        return self.cursor.fetchall()
+        exams = self._reference_data("exams", self._load_exams)
+        return sorted((e for e in exams.values() if e[1] == class_name), key=lambda e: e[0])
+
+    def get_exams_by_class_page(self, class_name, limit=50, after=None):
+        # Oldest first by date, then exam_id (idx_exams_class_date)
+        return self._page("Exams", "class_name = ?", [class_name], [("exam_date", 4), ("exam_id", 0)], limit, after)
+
+    def get_exams(self, class_name=None, date_from=None, date_to=None):
+        # Exams filtered by class and/or an inclusive YYYY-MM-DD date range; None means "all"
+        return [e for e in self._reference_data("exams", self._load_exams).values()
+                if (not class_name or e[1] == class_name)
+                and (not date_from or e[4] >= date_from)
+                and (not date_to or e[4] <= date_to)]
 
     def delete_exam(self, exam_id):
+        exam = self.get_exam(exam_id)
+        # Students who sat the exam may have been promoted out of its class
+        # since, so their profiles are found through their marks
+        self.cursor.execute("SELECT student_unique_id FROM Marks WHERE exam_id = ?", (exam_id,))
+        student_ids = [row[0] for row in self.cursor.fetchall()]
         self.cursor.execute("DELETE FROM Exams WHERE exam_id = ?", (exam_id,))
         self.conn.commit()
+        self.invalidate_reference(classes=False)
+        self.invalidate_profiles(student_ids=student_ids)
+        if exam:
+            self.invalidate_profiles(class_name=exam[1])
 
     # --- Marks Operations ---
     def add_or_update_mark(self, student_unique_id, exam_id, obtained_marks):
-        # Check if exists
-        self.cursor.execute("SELECT mark_id FROM Marks WHERE student_unique_id = ? AND exam_id = ?", (student_unique_id, exam_id))
-        result = self.cursor.fetchone()
-        if result:
-            self.cursor.execute("UPDATE Marks SET obtained_marks = ? WHERE mark_id = ?", (obtained_marks, result[0]))
-        else:
-            self.cursor.execute("INSERT INTO Marks (student_unique_id, exam_id, obtained_marks) VALUES (?, ?, ?)", 
-                                (student_unique_id, exam_id, obtained_marks))
-        self.conn.commit()
+        self.save_marks_bulk(exam_id, {student_unique_id: obtained_marks})
+
+    def save_marks_bulk(self, exam_id, marks_by_student):
+        # One UPSERT per student over idx_marks_exam_student, all in a single transaction.
+        # A mark of None deletes the student's row, i.e. marks them absent.
+        rows = [(std_id, exam_id, marks) for std_id, marks in marks_by_student.items() if marks is not None]
+        absent = [(exam_id, std_id) for std_id, marks in marks_by_student.items() if marks is None]
+        if not rows and not absent:
+            return 0
+        with self.conn:
+            if rows:
+                self.cursor.executemany("""
+                    INSERT INTO Marks (student_unique_id, exam_id, obtained_marks) VALUES (?, ?, ?)
+                    ON CONFLICT(exam_id, student_unique_id) DO UPDATE SET obtained_marks = excluded.obtained_marks
+                """, rows)
+            if absent:
+                self.cursor.executemany("DELETE FROM Marks WHERE exam_id = ? AND student_unique_id = ?", absent)
+        self.invalidate_profiles(list(marks_by_student))
+        return len(rows) + len(absent)
 
     def get_marks_for_student(self, student_unique_id):
         self.cursor.execute("""
@@ -233,26 +920,33 @@ class Database:
         return res[0] if res and res[0] is not None else 0
 
     def get_student_exam_stats(self, student_unique_id, class_name):
-        # Get total exams for this class
-        self.cursor.execute("SELECT COUNT(*) FROM Exams WHERE class_name = ?", (class_name,))
-        total_exams = self.cursor.fetchone()[0]
-        
-        # Get exams attended by student in this class
+        # Exams of the class, and how many of them the student has marks for
         self.cursor.execute("""
-            SELECT COUNT(*) FROM Marks m 
-            JOIN Exams e ON m.exam_id = e.exam_id 
-            WHERE m.student_unique_id = ? AND e.class_name = ?
-        """, (student_unique_id, class_name))
-        attended = self.cursor.fetchone()[0]
+            SELECT (SELECT COUNT(*) FROM Exams WHERE class_name = ?),
+                   (SELECT COUNT(*) FROM Marks m
+                    JOIN Exams e ON m.exam_id = e.exam_id
+                    WHERE m.student_unique_id = ? AND e.class_name = ?)
+        """, (class_name, student_unique_id, class_name))
+        total_exams, attended = self.cursor.fetchone()
         missed = total_exams - attended
         return total_exams, attended, missed
 
     # --- Payment Operations ---
     def get_payments_for_student(self, student_unique_id):
-        self.cursor.execute("SELECT * FROM Payments WHERE student_unique_id = ? ORDER BY year DESC, month DESC", (student_unique_id,))
+        # Newest month first (idx_payments_student_month)
+        self.cursor.execute("SELECT * FROM Payments WHERE student_unique_id = ? ORDER BY period DESC, payment_id DESC",
+                            (student_unique_id,))
         return self.cursor.fetchall()
 
+    def get_payments_for_student_page(self, student_unique_id, limit=50, after=None):
+        # Same order as get_payments_for_student, walking idx_payments_student_month backwards
+        return self._page("Payments", "student_unique_id = ?", [student_unique_id],
+                          [("period", 7), ("payment_id", 0)], limit, after, descending=True)
+
     def add_payment(self, student_unique_id, class_name, month, year, amount, paid_status='paid'):
+        if month not in MONTHS:
+            raise ValueError(f"Invalid month: {month}")
+        period = int(year) * 100 + MONTHS.index(month) + 1
         self.cursor.execute("SELECT payment_id FROM Payments WHERE student_unique_id = ? AND month = ? AND year = ?", 
                             (student_unique_id, month, year))
         result = self.cursor.fetchone()
@@ -260,10 +954,157 @@ class Database:
             self.cursor.execute("UPDATE Payments SET paid_status = ?, amount = ? WHERE payment_id = ?", (paid_status, amount, result[0]))
         else:
             self.cursor.execute("""
-                INSERT INTO Payments (student_unique_id, class_name, month, year, amount, paid_status)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (student_unique_id, class_name, month, year, amount, paid_status))
+                INSERT INTO Payments (student_unique_id, class_name, month, year, amount, paid_status, period)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (student_unique_id, class_name, month, year, amount, paid_status, period))
         self.conn.commit()
+        self.invalidate_profiles([student_unique_id])
+
+    @staticmethod
+    def _month_range(month_from, month_to):
+        # Inclusive "YYYY-MM" bounds as YYYYMM integers; January of this year
+        # up to the current month by default
+        def period(value):
+            year, month = (int(part) for part in value.split("-")[:2])
+            if not 1 <= month <= 12:
+                raise ValueError(f"Invalid month: {value}")
+            return year * 100 + month
+
+        today = datetime.date.today()
+        start = period(month_from) if month_from else today.year * 100 + 1
+        end = period(month_to) if month_to else today.year * 100 + today.month
+        if start > end:
+            raise ValueError("The start month is after the end month")
+        return start, end
+
+    def get_dues_ledger(self, class_name=None, month_from=None, month_to=None):
+        """Unpaid or part-paid months of active students, one row per student and month.
+
+        month_from/month_to are inclusive "YYYY-MM" strings (see _month_range);
+        the fee owed is the student's current class fee. Rows: (student_unique_id,
+        name, class, year, month, fee, paid, due), ordered by class, student, month.
+        """
+        start, end = self._month_range(month_from, month_to)
+        month_names = ", ".join(f"({i}, '{m}')" for i, m in enumerate(MONTHS, start=1))
+        class_clause = "AND s.current_class = ?" if class_name else ""
+        # Month calendar from a recursive CTE, crossed with the students; each
+        # (student, month) pair is one lookup on idx_payments_student_month
+        self.cursor.execute(f"""
+            WITH RECURSIVE calendar(period) AS (
+                SELECT ?
+                UNION ALL
+                SELECT CASE WHEN period % 100 = 12 THEN period + 89 ELSE period + 1 END
+                FROM calendar WHERE period < ?
+            ),
+            month_names(month_number, month) AS (VALUES {month_names}),
+            months AS (
+                SELECT c.period, CAST(c.period / 100 AS TEXT) AS year, n.month
+                FROM calendar c JOIN month_names n ON n.month_number = c.period % 100
+            )
+            SELECT s.unique_student_id, s.name, s.current_class, m.year, m.month, cl.monthly_fee,
+                   COALESCE(p.amount, 0.0), cl.monthly_fee - COALESCE(p.amount, 0.0)
+            FROM Students s
+            JOIN Classes cl ON cl.class_name = s.current_class
+            CROSS JOIN months m
+            LEFT JOIN Payments p ON p.student_unique_id = s.unique_student_id
+                AND p.period = m.period AND p.paid_status = 'paid'
+            WHERE s.status = 'active' {class_clause}
+              AND cl.monthly_fee > COALESCE(p.amount, 0.0)
+            ORDER BY s.current_class, s.id, m.period
+        """, [start, end] + ([class_name] if class_name else []))
+        return self.cursor.fetchall()
+
+    def get_defaulters(self, class_name=None, month_from=None, month_to=None):
+        """Active students with fees outstanding over a month range (see get_dues_ledger).
+
+        Rows: (student_unique_id, name, class, father_mobile, months_due,
+        amount_due), largest amount first. A month counts as due until it is
+        paid in full.
+        """
+        start, end = self._month_range(month_from, month_to)
+        months = (end // 100 - start // 100) * 12 + end % 100 - start % 100 + 1
+        class_clause = "AND s.current_class = ?" if class_name else ""
+        # Expected fees less what was paid, from one range scan of each student's
+        # payments on idx_payments_student_month instead of a probe per month
+        self.cursor.execute(f"""
+            SELECT unique_student_id, name, current_class, father_mobile,
+                   ? - full_months, ? * monthly_fee - paid
+            FROM (
+                SELECT s.id, s.unique_student_id, s.name, s.current_class, s.father_mobile, cl.monthly_fee,
+                       COALESCE(SUM(MIN(p.amount, cl.monthly_fee)), 0.0) AS paid,
+                       COUNT(CASE WHEN p.amount >= cl.monthly_fee THEN 1 END) AS full_months
+                FROM Students s
+                JOIN Classes cl ON cl.class_name = s.current_class
+                LEFT JOIN Payments p ON p.student_unique_id = s.unique_student_id
+                    AND p.period BETWEEN ? AND ? AND p.paid_status = 'paid'
+                WHERE s.status = 'active' {class_clause}
+                GROUP BY s.id
+            )
+            WHERE ? * monthly_fee - paid > 0
+            ORDER BY 6 DESC, current_class, id
+        """, [months, months, start, end] + ([class_name] if class_name else []) + [months])
+        return self.cursor.fetchall()
+
+    # --- Revenue (MonthlyRevenueStats, see migration 6) ---
+    def get_monthly_revenue(self, month_from=None, month_to=None, class_name=None):
+        """Paid revenue per month over an inclusive "YYYY-MM" range (see _month_range).
+
+        Rows: (year, month_number, revenue, payment_count) for every month of the
+        range, zero for months without payments. Payments whose month is not a
+        month name (period YYYY00) only show up in the yearly figures.
+        """
+        start, end = self._month_range(month_from, month_to)
+        class_clause = "AND class_name = ?" if class_name else ""
+        self.cursor.execute(f"""
+            SELECT period, SUM(revenue), SUM(payment_count) FROM MonthlyRevenueStats
+            WHERE period BETWEEN ? AND ? {class_clause}
+            GROUP BY period
+        """, [start, end] + ([class_name] if class_name else []))
+        totals = {row[0]: row[1:] for row in self.cursor.fetchall()}
+        rows = []
+        period = start
+        while period <= end:
+            revenue, count = totals.get(period, (0.0, 0))
+            rows.append((period // 100, period % 100, revenue, count))
+            period += 89 if period % 100 == 12 else 1
+        return rows
+
+    def get_yearly_revenue(self, year_from=None, year_to=None, class_name=None):
+        """Paid revenue per year: (year, revenue, payment_count), oldest first, years with payments only."""
+        clauses, params = [], []
+        if year_from:
+            clauses.append("period >= ?")
+            params.append(int(year_from) * 100)
+        if year_to:
+            clauses.append("period <= ?")
+            params.append(int(year_to) * 100 + 12)
+        if class_name:
+            clauses.append("class_name = ?")
+            params.append(class_name)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        self.cursor.execute(f"""
+            SELECT period / 100, SUM(revenue), SUM(payment_count) FROM MonthlyRevenueStats
+            {where}
+            GROUP BY period / 100
+            HAVING SUM(payment_count) > 0
+            ORDER BY 1
+        """, params)
+        return self.cursor.fetchall()
+
+    def get_class_revenue(self, month_from=None, month_to=None):
+        """Paid revenue per class over a "YYYY-MM" range: (class_name, revenue, payment_count), largest first.
+
+        Like get_monthly_revenue, this leaves out payments without a valid month.
+        """
+        start, end = self._month_range(month_from, month_to)
+        self.cursor.execute("""
+            SELECT class_name, SUM(revenue), SUM(payment_count) FROM MonthlyRevenueStats
+            WHERE period BETWEEN ? AND ?
+            GROUP BY class_name
+            HAVING SUM(payment_count) > 0
+            ORDER BY 2 DESC, class_name
+        """, (start, end))
+        return self.cursor.fetchall()
 
     # --- Promotion Operations ---
     def promote_student(self, student_unique_id, new_class, overall_summary=""):
@@ -272,16 +1113,60 @@ class Database:
         if not res: return
         old_class = res[0]
         current_year = str(datetime.datetime.now().year)
-        
-        # Insert into promotion history
-        self.cursor.execute("""
-            INSERT INTO PromotionHistory (student_unique_id, old_class, new_class, year, overall_result_summary)
-            VALUES (?, ?, ?, ?, ?)
-        """, (student_unique_id, old_class, new_class, current_year, overall_summary))
-        
-        # Update current class
-        self.cursor.execute("UPDATE Students SET current_class = ? WHERE unique_student_id = ?", (new_class, student_unique_id))
-        self.conn.commit()
+
+        with self.conn:
+            self.cursor.execute("""
+                INSERT INTO PromotionHistory (student_unique_id, year, from_class, to_class, overall_result_summary)
+                VALUES (?, ?, ?, ?, ?)
+            """, (student_unique_id, current_year, old_class, new_class, overall_summary))
+            self.cursor.execute("""
+                UPDATE Students SET current_class = ?, status = CASE WHEN ? = ? THEN 'graduated' ELSE status END
+                WHERE unique_student_id = ?
+            """, (new_class, new_class, GRADUATED, student_unique_id))
+        self.invalidate_profiles([student_unique_id])
+
+    def get_promotion_sequence(self):
+        # Year-end order: the top class graduates first, then each class moves
+        # into the one just vacated above it (Class 10 -> Graduated, 9 -> 10, ...)
+        classes = [c[1] for c in self.get_classes()]
+        targets = classes[1:] + [GRADUATED]
+        return list(reversed(list(zip(classes, targets))))
+
+    def promote_classes(self, steps, dry_run=False):
+        """Promote every active student for each (old_class, new_class) step.
+
+        All steps run set-based in one transaction, so either the whole pass is
+        applied or nothing is. With dry_run the per-step counts are returned
+        without writing. Students moved to GRADUATED also get status
+        'graduated'. Returns a list of (old_class, new_class, count).
+        """
+        if dry_run:
+            self.cursor.execute("SELECT current_class, COUNT(*) FROM Students WHERE status = 'active' GROUP BY current_class")
+            active = dict(self.cursor.fetchall())
+            return [(old, new, active.get(old, 0)) for old, new in steps]
+
+        current_year = str(datetime.datetime.now().year)
+        results = []
+        with self.conn:
+            for old_class, new_class in steps:
+                self.cursor.execute("""
+                    INSERT INTO PromotionHistory (student_unique_id, year, from_class, to_class, overall_result_summary)
+                    SELECT unique_student_id, ?, current_class, ?, ?
+                    FROM Students WHERE current_class = ? AND status = 'active'
+                """, (current_year, new_class, f"Promoted from {old_class} to {new_class}", old_class))
+                self.cursor.execute("""
+                    UPDATE Students SET current_class = ?, status = CASE WHEN ? = ? THEN 'graduated' ELSE status END
+                    WHERE current_class = ? AND status = 'active'
+                """, (new_class, new_class, GRADUATED, old_class))
+                results.append((old_class, new_class, self.cursor.rowcount))
+        self.invalidate_profiles()
+        return results
+
+    def promote_class(self, old_class, new_class, dry_run=False):
+        return self.promote_classes([(old_class, new_class)], dry_run)[0][2]
+
+    def promote_all_classes(self, dry_run=False):
+        return self.promote_classes(self.get_promotion_sequence(), dry_run)
 
     def get_promotion_history(self, student_unique_id):
         self.cursor.execute("SELECT * FROM PromotionHistory WHERE student_unique_id = ? ORDER BY year DESC", (student_unique_id,))
@@ -300,19 +1185,54 @@ class Database:
         self.cursor.execute("SELECT COUNT(*) FROM Exams")
         return self.cursor.fetchone()[0]
 
-    def get_total_revenue(self):
-        current_year = str(datetime.datetime.now().year)
-        self.cursor.execute("SELECT SUM(amount) FROM Payments WHERE year = ? AND paid_status = 'paid'", (current_year,))
+    @staticmethod
+    def _year_periods(year):
+        # Period bounds of a year (default: this year), month 00 included
+        year = int(year or datetime.datetime.now().year)
+        return year * 100, year * 100 + 12
+
+    def get_total_revenue(self, year=None):
+        # Paid revenue of one year from the monthly rollup
+        self.cursor.execute("SELECT SUM(revenue) FROM MonthlyRevenueStats WHERE period BETWEEN ? AND ?",
+                            self._year_periods(year))
         res = self.cursor.fetchone()
         return res[0] if res and res[0] else 0.0
 
-    def get_total_payments(self):
-        current_year = str(datetime.datetime.now().year)
-        self.cursor.execute("SELECT COUNT(*) FROM Payments WHERE year = ? AND paid_status = 'paid'", (current_year,))
-        return self.cursor.fetchone()[0]
+    def get_total_payments(self, year=None):
+        self.cursor.execute("SELECT SUM(payment_count) FROM MonthlyRevenueStats WHERE period BETWEEN ? AND ?",
+                            self._year_periods(year))
+        res = self.cursor.fetchone()
+        return res[0] if res and res[0] else 0
+
+    def get_dashboard_stats(self, year=None):
+        # A single read of the trigger-maintained counters (see migrations 4 and 6)
+        self.cursor.execute("""
+            SELECT s.total_students, s.total_batches, s.total_exams,
+                   (SELECT COALESCE(SUM(revenue), 0.0) FROM MonthlyRevenueStats WHERE period BETWEEN ?1 AND ?2),
+                   (SELECT COALESCE(SUM(payment_count), 0) FROM MonthlyRevenueStats WHERE period BETWEEN ?1 AND ?2)
+            FROM SummaryStats s
+            WHERE s.id = 1
+        """, self._year_periods(year))
+        row = self.cursor.fetchone() or (0, 0, 0, 0.0, 0)
+        return {
+            "total_students": row[0],
+            "total_batches": row[1],
+            "total_exams": row[2],
+            "total_revenue": row[3],
+            "total_payments": row[4],
+        }
+
+    def rebuild_stats(self):
+        with self.conn:
+            _rebuild_stats(self.cursor)
+            _rebuild_monthly_revenue(self.cursor)
 
     def close(self):
-        self.conn.close()
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
 
 if __name__ == "__main__":
     db = Database()
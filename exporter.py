@@ -0,0 +1,192 @@
+import csv
+import gzip
+import os
+from datetime import datetime
+
+
+def _open_output(path, compress):
+    if compress:
+        if not path.endswith(".gz"):
+            path += ".gz"
+        return path, gzip.open(path, "wt", newline="", encoding="utf-8")
+    return path, open(path, "w", newline="", encoding="utf-8")
+
+
+def write_csv(path, header, rows, compress=False, progress_callback=None, progress_every=1000, total=0):
+    """Write rows (any iterable) to CSV, optionally gzip-compressed.
+
+    Rows are written as they arrive, so memory use does not depend on the row
+    count. progress_callback(rows_written, total) may raise to cancel; total
+    is the expected row count (a COUNT(*) taken before writing).
+    Returns (absolute path, rows written).
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    path, f = _open_output(path, compress)
+    count = 0
+    with f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+            if progress_callback and count % progress_every == 0:
+                progress_callback(count, max(total, count))
+    if progress_callback:
+        progress_callback(count, max(total, count))
+    return os.path.abspath(path), count
+
+
+def _count(db, sql, params=()):
+    return db.conn.execute(sql, params).fetchone()[0]
+
+
+def export_filename(kind, output_dir="output/exports", suffix=""):
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(output_dir, f"{kind}{suffix}_{timestamp}.csv")
+
+
+def _payments_where(year, class_name):
+    clauses, params = [], []
+    if year:
+        clauses.append("p.year = ?")
+        params.append(str(year))
+    if class_name:
+        clauses.append("p.class_name = ?")
+        params.append(class_name)
+    return f"WHERE {' AND '.join(clauses)}" if clauses else "", params
+
+
+def count_payments(db, year=None, class_name=None):
+    where, params = _payments_where(year, class_name)
+    return _count(db, f"SELECT COUNT(*) FROM Payments p {where}", params)
+
+
+def export_payments(db, path, year=None, class_name=None, compress=False, progress_callback=None):
+    """The Payments ledger joined with student names, optionally for one year/class."""
+    where, params = _payments_where(year, class_name)
+    rows = db.iter_query(f"""
+        SELECT p.payment_id, p.student_unique_id, s.name, p.class_name, p.month, p.year, p.amount, p.paid_status
+        FROM Payments p
+        LEFT JOIN Students s ON s.unique_student_id = p.student_unique_id
+        {where}
+        ORDER BY p.payment_id
+    """, params)
+    header = ["Payment ID", "Student ID", "Student Name", "Class", "Month", "Year", "Amount", "Status"]
+    return write_csv(path, header, rows, compress, progress_callback,
+                     total=count_payments(db, year, class_name))
+
+
+def _roster_where(class_name, include_inactive):
+    clauses, params = [], []
+    if class_name:
+        clauses.append("current_class = ?")
+        params.append(class_name)
+    if not include_inactive:
+        clauses.append("status = 'active'")
+    return f"WHERE {' AND '.join(clauses)}" if clauses else "", params
+
+
+def count_roster(db, class_name=None, include_inactive=False):
+    where, params = _roster_where(class_name, include_inactive)
+    return _count(db, f"SELECT COUNT(*) FROM Students {where}", params)
+
+
+def export_roster(db, path, class_name=None, include_inactive=False, compress=False, progress_callback=None):
+    where, params = _roster_where(class_name, include_inactive)
+    rows = db.iter_query(f"""
+        SELECT unique_student_id, name, father_name, mother_name, father_mobile, alternative_mobile,
+               current_class, section, status
+        FROM Students {where}
+        ORDER BY current_class, id
+    """, params)
+    header = ["Student ID", "Name", "Father's Name", "Mother's Name", "Father's Mobile", "Alternative Mobile",
+              "Class", "Section", "Status"]
+    return write_csv(path, header, rows, compress, progress_callback,
+                     total=count_roster(db, class_name, include_inactive))
+
+
+def iter_marks_matrix(db, class_name, exam_ids):
+    """One row per active student of the class with a column per exam.
+
+    Built in a single pass over marks sorted by student: consecutive rows for
+    the same student are folded into one output row before moving on.
+    """
+    column = {exam_id: i for i, exam_id in enumerate(exam_ids)}
+    rows = db.iter_query("""
+        SELECT s.unique_student_id, s.name, m.exam_id, m.obtained_marks
+        FROM Students s
+        LEFT JOIN Marks m ON m.student_unique_id = s.unique_student_id
+            AND m.exam_id IN (SELECT exam_id FROM Exams WHERE class_name = ?)
+        WHERE s.current_class = ? AND s.status = 'active'
+        ORDER BY s.id
+    """, (class_name, class_name))
+
+    current = None
+    for std_id, name, exam_id, marks in rows:
+        if current is None or current[0] != std_id:
+            if current is not None:
+                yield current
+            current = [std_id, name] + ["Absent"] * len(exam_ids)
+        if exam_id in column:
+            current[2 + column[exam_id]] = marks
+    if current is not None:
+        yield current
+
+
+def export_marks_matrix(db, path, class_name, compress=False, progress_callback=None):
+    exams = db.get_exams(class_name)
+    # e: exam_id, class_name, exam_name, total_marks, exam_date
+    header = ["Student ID", "Name"] + [f"{e[2]} ({e[4]}, /{e[3]:g})" for e in exams]
+    rows = iter_marks_matrix(db, class_name, [e[0] for e in exams])
+    # One row per active student of the class
+    return write_csv(path, header, rows, compress, progress_callback,
+                     total=count_roster(db, class_name))
+
+
+def export_all(db, output_dir="output/exports", compress=False, progress_callback=None):
+    """Payments ledger, full roster and one marks matrix per class. Returns the files written.
+
+    progress_callback(rows_written, total) counts rows across all the files.
+    """
+    classes = [c[1] for c in db.get_classes()]
+    totals = [count_payments(db), count_roster(db, include_inactive=True)]
+    totals += [count_roster(db, class_name) for class_name in classes]
+    grand_total = sum(totals)
+    written = 0
+
+    def file_progress(done, total):
+        if progress_callback:
+            progress_callback(written + done, max(grand_total, written + done))
+
+    def finished(result):
+        nonlocal written
+        written += result[1]
+        return result[0]
+
+    files = [
+        finished(export_payments(db, export_filename("payments", output_dir), compress=compress,
+                                 progress_callback=file_progress)),
+        finished(export_roster(db, export_filename("roster", output_dir), include_inactive=True,
+                               compress=compress, progress_callback=file_progress)),
+    ]
+    for class_name in classes:
+        suffix = "_" + class_name.replace(" ", "")
+        files.append(finished(export_marks_matrix(db, export_filename("marks", output_dir, suffix), class_name,
+                                                  compress=compress, progress_callback=file_progress)))
+    return files
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import Database
+
+    parser = argparse.ArgumentParser(description="Export payments, rosters and marks matrices to CSV.")
+    parser.add_argument("--db", default="coaching_center.db")
+    parser.add_argument("--output", default="output/exports")
+    parser.add_argument("--gzip", action="store_true")
+    args = parser.parse_args()
+
+    db = Database(args.db, read_only=True)
+    for path in export_all(db, args.output, args.gzip):
+        print(path)
+    db.close()
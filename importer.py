@@ -0,0 +1,175 @@
+import csv
+import os
+import re
+import sqlite3
+
+# Roster column -> Students field. Headers are matched case-insensitively,
+# ignoring spaces, underscores and apostrophes.
+COLUMN_ALIASES = {
+    "name": "name",
+    "studentname": "name",
+    "fathername": "father_name",
+    "fathersname": "father_name",
+    "mothername": "mother_name",
+    "mothersname": "mother_name",
+    "fathermobile": "father_mobile",
+    "fathersmobile": "father_mobile",
+    "mobile": "father_mobile",
+    "phone": "father_mobile",
+    "alternativemobile": "alternative_mobile",
+    "altmobile": "alternative_mobile",
+    "class": "current_class",
+    "currentclass": "current_class",
+    "section": "section",
+}
+
+FIELDS = ("name", "father_name", "mother_name", "father_mobile", "alternative_mobile", "current_class", "section")
+
+MOBILE_PATTERN = re.compile(r"^\+?[0-9][0-9 -]{3,19}$")
+
+
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.errors = []  # (line number, message)
+        self.error_file = None
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+    def write_errors(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["line", "error"])
+            writer.writerows(self.errors)
+        self.error_file = path
+        return path
+
+
+class ReadProgress:
+    """How far a roster has been read: done out of total. CSV rosters count
+    bytes of the file; XLSX rosters count sheet rows, since the file itself
+    is compressed. total is 0 when it is not known."""
+
+    def __init__(self):
+        self.done = 0
+        self.total = 0
+
+
+def _normalize_header(header):
+    return re.sub(r"[\s_'-]", "", str(header or "")).lower()
+
+
+def _iter_csv(path, progress):
+    progress.total = os.path.getsize(path)
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.reader(f):
+            # Bytes taken from the file so far (read ahead in blocks)
+            progress.done = f.buffer.tell()
+            yield row
+
+
+def _iter_xlsx(path, progress):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Reading .xlsx rosters needs the openpyxl package")
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        progress.total = sheet.max_row or 0
+        for row in sheet.iter_rows(values_only=True):
+            progress.done += 1
+            yield ["" if v is None else str(v) for v in row]
+    finally:
+        workbook.close()
+
+
+def iter_roster(path, progress=None):
+    """Yield (line number, {field: value}) for each data row, one row at a time.
+    A ReadProgress passed in is kept up to date as the file is read."""
+    if progress is None:
+        progress = ReadProgress()
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".xlsx":
+        rows = _iter_xlsx(path, progress)
+    elif ext == ".csv":
+        rows = _iter_csv(path, progress)
+    else:
+        raise ValueError(f"Unsupported roster format: {ext or path}")
+
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = [COLUMN_ALIASES.get(_normalize_header(h)) for h in header]
+    if "name" not in columns:
+        raise ValueError("Roster has no Name column")
+
+    for line, row in enumerate(rows, start=2):
+        if not any(str(v).strip() for v in row):
+            continue
+        record = {}
+        for field, value in zip(columns, row):
+            if field:
+                record[field] = str(value).strip()
+        yield line, record
+
+
+def validate_record(record, classes, default_class=None):
+    """Return (row tuple for Database.add_students_bulk, error message or None)."""
+    if not record.get("name"):
+        return None, "Name is required"
+    if not record.get("father_mobile"):
+        return None, "Father's Mobile is required"
+    for field in ("father_mobile", "alternative_mobile"):
+        if record.get(field) and not MOBILE_PATTERN.match(record[field]):
+            return None, f"Invalid mobile number: {record[field]}"
+    record.setdefault("current_class", "")
+    if not record["current_class"]:
+        record["current_class"] = default_class or ""
+    if record["current_class"] not in classes:
+        return None, f"Unknown class: {record['current_class'] or '(blank)'}"
+    return tuple(record.get(f, "") for f in FIELDS), None
+
+
+def import_students(db, path, default_class=None, chunk_size=500, progress_callback=None):
+    """Stream a CSV/XLSX roster into Students.
+
+    Rows are validated one at a time and inserted in chunks, each chunk in a
+    single transaction with a freshly reserved block of IDs. Bad rows are
+    recorded in the returned ImportReport instead of aborting the import.
+    progress_callback(done, total) reports how much of the file has been read
+    (see ReadProgress) and may raise to cancel between chunks.
+    """
+    classes = {c[1] for c in db.get_classes()}
+    report = ImportReport()
+    chunk = []
+    progress = ReadProgress()
+
+    def flush():
+        try:
+            report.imported += len(db.add_students_bulk([row for _, row in chunk]))
+        except sqlite3.Error:
+            # Find the offending rows one by one; the rest still go in
+            for line, row in chunk:
+                try:
+                    db.add_students_bulk([row])
+                    report.imported += 1
+                except sqlite3.Error as e:
+                    report.errors.append((line, str(e)))
+        chunk.clear()
+        if progress_callback:
+            progress_callback(progress.done, max(progress.total, progress.done))
+
+    for line, record in iter_roster(path, progress):
+        row, error = validate_record(record, classes, default_class)
+        if error:
+            report.errors.append((line, error))
+            continue
+        chunk.append((line, row))
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+    return report
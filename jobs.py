@@ -0,0 +1,80 @@
+import threading
+import time
+
+from kivy.clock import Clock
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class BackgroundJob:
+    """Runs target(job) on a worker thread.
+
+    The target reports progress with job.report_progress(done, total), which
+    also raises JobCancelled once cancel() has been called. All callbacks are
+    delivered on the Kivy main thread through Clock.schedule_once.
+    """
+
+    # Minimum seconds between progress updates posted to the main thread
+    progress_interval = 0.1
+    # Called with no arguments on the worker thread once the target has
+    # finished, e.g. to close the database connection the thread opened
+    thread_exit_hooks = []
+
+    def __init__(self, target, on_progress=None, on_complete=None, on_error=None, on_cancel=None):
+        self.target = target
+        self.on_progress = on_progress
+        self.on_complete = on_complete
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self._cancel_event = threading.Event()
+        self._last_progress = 0.0
+        self._thread = None
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def report_progress(self, done, total):
+        self.check_cancelled()
+        now = time.monotonic()
+        if self.on_progress and (done >= total or now - self._last_progress >= self.progress_interval):
+            self._last_progress = now
+            self._post(self.on_progress, done, total)
+
+    def _post(self, callback, *args):
+        if callback:
+            Clock.schedule_once(lambda dt: callback(*args))
+
+    def _run(self):
+        try:
+            result = self.target(self)
+        except JobCancelled:
+            self._post(self.on_cancel)
+        except Exception as e:
+            self._post(self.on_error, e)
+        else:
+            if self.cancelled:
+                self._post(self.on_cancel)
+            else:
+                self._post(self.on_complete, result)
+        finally:
+            for hook in self.thread_exit_hooks:
+                hook()
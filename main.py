@@ -1,4 +1,15 @@
 import os
+import time
+
+# Imported first so it can time every import that follows when enabled
+import startup_profiler
+import query_stats
+
+__version__ = "0.1"
+
+# Reference point for the time-to-login-screen measurement
+APP_START = startup_profiler.START
+
 from kivy.app import App
 from kivy.lang import Builder
 from kivy.uix.screenmanager import ScreenManager, Screen
@@ -6,17 +17,28 @@ from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.uix.popup import Popup
 from kivy.uix.textinput import TextInput
+from kivy.uix.progressbar import ProgressBar
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.gridlayout import GridLayout
+from kivy.uix.scrollview import ScrollView
+from kivy.uix.widget import Widget
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.properties import StringProperty, ListProperty
+from kivy.graphics import Color, Rectangle
 from kivy.metrics import dp
+from kivy.clock import Clock
+from kivy.logger import Logger
 
-from kivy.core.window import Window
+startup_profiler.mark("kivy imported")
 
-from database import Database
-from pdf_generator import generate_exam_result_pdf
+from datetime import date, datetime
 
-# Set light background
-Window.clearcolor = (0.95, 0.95, 0.95, 1)
+import backup
+from jobs import BackgroundJob
+from ui_scheduler import IncrementalBuilder
+from importer import import_students
+from exporter import export_all
+from services import db, pdf, batch_reports, analytics
 
 # Apply global light theme rules
 Builder.load_string('''
@@ -35,8 +57,7 @@ Builder.load_string('''
     color: 1, 1, 1, 1
 ''')
 
-# Initialize Database global instance
-db = Database()
+startup_profiler.mark("theme rules loaded")
 
 def show_popup(title, message):
     layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
@@ -47,8 +68,109 @@ def show_popup(title, message):
     btn.bind(on_release=popup.dismiss)
     popup.open()
 
+def release_db_connection():
+    # Jobs query the shared db from their worker thread, which opens a
+    # connection for that thread; close it when the job ends
+    if db.ready:
+        db.release_thread_connection()
+
+BackgroundJob.thread_exit_hooks.append(release_db_connection)
+
+def run_in_background(title, target, on_complete, describe_progress=None):
+    """Run target(job) on a worker thread behind a progress popup with a Cancel button.
+    describe_progress(done, total) gives the status text; default "done / total"."""
+    layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
+    status = Label(text="Starting...")
+    bar = ProgressBar(max=1, value=0, size_hint_y=None, height=dp(20))
+    btn = Button(text="Cancel", size_hint_y=None, height=dp(40))
+    layout.add_widget(status)
+    layout.add_widget(bar)
+    layout.add_widget(btn)
+    popup = Popup(title=title, content=layout, size_hint=(0.8, 0.4), auto_dismiss=False)
+
+    def on_progress(done, total):
+        bar.max = max(total, 1)
+        bar.value = done
+        status.text = describe_progress(done, total) if describe_progress else f"{done} / {total}"
+
+    def on_finished(result):
+        popup.dismiss()
+        on_complete(result)
+
+    def on_error(error):
+        popup.dismiss()
+        show_popup("Error", str(error))
+
+    def on_cancel():
+        popup.dismiss()
+        show_popup("Cancelled", f"{title} was cancelled.")
+
+    job = BackgroundJob(target, on_progress=on_progress, on_complete=on_finished,
+                        on_error=on_error, on_cancel=on_cancel)
+    btn.bind(on_release=lambda x: job.cancel())
+    popup.open()
+    return job.start()
+
+
+class PagedLoader:
+    """Feeds a ScrollView/RecycleView one keyset page at a time (infinite scroll).
+
+    fetch(after) returns (rows, token) as the Database *_page methods do, and
+    add(rows) appends rows to the list. The next page is fetched when the
+    view is scrolled to within `threshold` of its bottom.
+    """
+
+    def __init__(self, scroll_view, fetch, add, threshold=0.1):
+        self.fetch = fetch
+        self.add = add
+        self.threshold = threshold
+        self.token = None
+        self.exhausted = False
+        scroll_view.bind(scroll_y=self._on_scroll)
+
+    def reset(self, fetch=None):
+        if fetch is not None:
+            self.fetch = fetch
+        self.token = None
+        self.exhausted = False
+        self.load_next()
+
+    def load_next(self):
+        if self.exhausted:
+            return
+        rows, self.token = self.fetch(self.token)
+        self.exhausted = self.token is None
+        self.add(rows)
+
+    def _on_scroll(self, view, scroll_y):
+        if scroll_y <= self.threshold:
+            self.load_next()
+
+
+def backup_database(job=None):
+    """Worker target: snapshot the database into backups/ and remember when."""
+    path = backup.create_backup(db.db_name, progress_callback=job.report_progress if job else None)
+    db.set_setting('last_backup_at', datetime.now().isoformat(timespec='seconds'))
+    return path
+
 # --- Screens ---
 class LoginScreen(Screen):
+    _startup_logged = False
+
+    def on_enter(self):
+        if not LoginScreen._startup_logged:
+            LoginScreen._startup_logged = True
+            startup_profiler.mark("login screen shown")
+            Logger.info(f"Startup: login screen shown {(time.perf_counter() - APP_START) * 1000:.0f} ms after launch")
+            # Open the database in the next frame, while the user is typing
+            Clock.schedule_once(self._warm_services, 0)
+
+    def _warm_services(self, dt):
+        db.get()
+        log_path = startup_profiler.finish(__version__)
+        if log_path:
+            Logger.info(f"Startup: profile appended to {log_path}")
+
     def do_login(self, username, password):
         if username == 'admin' and db.verify_admin(password):
             self.manager.current = 'dashboard'
@@ -59,6 +181,12 @@ class LoginScreen(Screen):
             self.ids.error_msg.text = 'Invalid Credentials!'
 
 class DashboardScreen(Screen):
+    def on_enter(self):
+        stats = db.get_dashboard_stats()
+        self.ids.summary_label.text = (f"{stats['total_students']} active students  |  "
+                                       f"{stats['total_exams']} exams  |  "
+                                       f"${stats['total_revenue']:.2f} collected this year")
+
     def logout(self):
         self.manager.current = 'login'
 
@@ -66,9 +194,17 @@ class DashboardScreen(Screen):
         self.manager.current = 'reports'
 
 class BatchListScreen(Screen):
+    page_size = 30
+    _pages = None
+
     def on_enter(self):
         self.ids.batch_grid.clear_widgets()
-        classes = db.get_classes()
+        if self._pages is None:
+            self._pages = PagedLoader(self.ids.batch_scroll,
+                                      lambda after: db.get_classes_page(self.page_size, after), self.add_classes)
+        self._pages.reset()
+
+    def add_classes(self, classes):
         for c in classes:
             btn = Button(text=c[1], size_hint_y=None, height=dp(60))
             btn.bind(on_release=lambda instance, class_name=c[1]: self.go_to_class(class_name))
@@ -80,27 +216,36 @@ class BatchListScreen(Screen):
         self.manager.current = 'class_management'
 
 
+class StudentRow(RecycleDataViewBehavior, BoxLayout):
+    # One recycled row of the class student list; see class_management.kv
+    student_id = StringProperty('')
+    student_name = StringProperty('')
+    section = StringProperty('')
+
+
 class ClassManagementScreen(Screen):
     def on_enter(self):
         app = App.get_running_app()
         self.ids.title_label.text = f'Management - {app.selected_class}'
         self.load_students()
 
-    def load_students(self):
-        self.ids.students_list.clear_widgets()
-        app = App.get_running_app()
-        students = db.get_students_by_class(app.selected_class)
-        for s in students:
-            row = BoxLayout(size_hint_y=None, height=dp(40), spacing=5)
-            row.add_widget(Label(text=s[1], size_hint_x=0.2)) # ID
-            row.add_widget(Label(text=s[2], size_hint_x=0.5)) # Name
-            row.add_widget(Label(text=s[8] if s[8] else "N/A", size_hint_x=0.15)) # Section
-            
-            btn = Button(text='View', size_hint_x=0.15, background_color=(0.2, 0.6, 0.8, 1))
-            btn.bind(on_release=lambda instance, std_id=s[1]: self.view_student(std_id))
-            row.add_widget(btn)
+    page_size = 50
+    _pages = None
+    _exam_pages = None
 
-            self.ids.students_list.add_widget(row)
+    def load_students(self):
+        # First page now, the rest as the list is scrolled
+        class_name = App.get_running_app().selected_class
+        self.ids.students_list.data = []
+        if self._pages is None:
+            self._pages = PagedLoader(self.ids.students_list, None, self.add_students)
+        self._pages.reset(lambda after: db.get_students_by_class_page(class_name, self.page_size, after))
+
+    def add_students(self, students):
+        self.ids.students_list.data.extend(
+            {'student_id': s[1], 'student_name': s[2], 'section': s[8] if s[8] else "N/A"}
+            for s in students
+        )
 
     def go_to_add_student(self):
         self.manager.current = 'add_student'
@@ -111,14 +256,20 @@ class ClassManagementScreen(Screen):
         
         btn_add = Button(text="Add New Exam")
         btn_view = Button(text="View Existing Exams / Enter Marks")
+        btn_batch = Button(text="Result Sheets for All Exams")
+        btn_merged = Button(text="Combined Result Book")
         
         layout.add_widget(btn_add)
         layout.add_widget(btn_view)
+        layout.add_widget(btn_batch)
+        layout.add_widget(btn_merged)
         
-        popup = Popup(title="Exam Management", content=layout, size_hint=(0.8, 0.5))
+        popup = Popup(title="Exam Management", content=layout, size_hint=(0.8, 0.6))
         
         btn_add.bind(on_release=lambda x: self.open_add_exam(popup))
         btn_view.bind(on_release=lambda x: self.open_view_exams(popup))
+        btn_batch.bind(on_release=lambda x: self.generate_all_results(popup, merge=False))
+        btn_merged.bind(on_release=lambda x: self.generate_all_results(popup, merge=True))
         
         popup.open()
         
@@ -128,24 +279,52 @@ class ClassManagementScreen(Screen):
         
     def open_view_exams(self, popup):
         popup.dismiss()
-        app = App.get_running_app()
-        exams = db.get_exams_by_class(app.selected_class)
-        if not exams:
-            show_popup("Exams", "No exams found for this class.")
-            return
-            
-        layout = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        class_name = App.get_running_app().selected_class
+        scroll = ScrollView()
         grid = GridLayout(cols=1, spacing=5, size_hint_y=None)
         grid.bind(minimum_height=grid.setter('height'))
-        
-        for e in exams:
-            btn = Button(text=f"{e[2]} - {e[4]}", size_hint_y=None, height=dp(40))
-            btn.bind(on_release=lambda instance, exam_id=e[0]: self.open_marks_entry(exam_id, popup2))
-            grid.add_widget(btn)
-            
-        popup2 = Popup(title="Select Exam", content=grid, size_hint=(0.8, 0.8))
+        scroll.add_widget(grid)
+        popup2 = Popup(title="Select Exam", content=scroll, size_hint=(0.8, 0.8))
+
+        def add_exams(rows):
+            for e in rows:
+                btn = Button(text=f"{e[2]} - {e[4]}", size_hint_y=None, height=dp(40))
+                btn.bind(on_release=lambda instance, exam_id=e[0]: self.open_marks_entry(exam_id, popup2))
+                grid.add_widget(btn)
+
+        # Kivy binds scroll_y weakly, so the loader is kept on the screen while the popup is open
+        self._exam_pages = PagedLoader(
+            scroll, lambda after: db.get_exams_by_class_page(class_name, self.page_size, after), add_exams)
+        self._exam_pages.reset()
+        if not grid.children:
+            self._exam_pages = None
+            show_popup("Exams", "No exams found for this class.")
+            return
+        popup2.bind(on_dismiss=lambda instance: setattr(self, '_exam_pages', None))
         popup2.open()
         
+    def generate_all_results(self, popup, merge):
+        popup.dismiss()
+        class_name = App.get_running_app().selected_class
+
+        def build(job):
+            reader = db.reader()
+            try:
+                return batch_reports.generate_batch_result_pdfs(reader, class_name=class_name, merge=merge,
+                                                                progress_callback=job.report_progress)
+            finally:
+                reader.close()
+
+        def done(result):
+            if not result["sheets"]:
+                show_popup("Exams", "No exams found for this class.")
+                return
+            show_popup("PDFs Generated",
+                       f"{result['sheets']} result sheets in {len(result['files'])} file(s)\n"
+                       f"({result['sheets_per_sec']:.1f} sheets/sec)")
+
+        run_in_background("Generating Result Sheets", build, done)
+
     def open_marks_entry(self, exam_id, popup2):
         popup2.dismiss()
         app = App.get_running_app()
@@ -187,17 +366,57 @@ class AddStudentScreen(Screen):
         show_popup("Success", f"Student Added Successfully!\nID: {std_id}")
         self.go_back()
 
+    def open_bulk_import(self):
+        layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
+        layout.add_widget(Label(text="Roster file (.csv or .xlsx).\nRows without a class go to the current class."))
+        path_input = TextInput(hint_text="/path/to/roster.csv", multiline=False, size_hint_y=None, height=dp(40))
+        layout.add_widget(path_input)
+        btn = Button(text="Import", size_hint_y=None, height=dp(40))
+        layout.add_widget(btn)
+        popup = Popup(title="Bulk Import Students", content=layout, size_hint=(0.9, 0.5))
+        btn.bind(on_release=lambda x: self.bulk_import(path_input.text.strip(), popup))
+        popup.open()
+
+    def bulk_import(self, path, popup):
+        if not os.path.isfile(path):
+            show_popup("Error", "File not found.")
+            return
+        popup.dismiss()
+        default_class = self.ids.class_input.text.strip()
+
+        def run(job):
+            report = import_students(db, path, default_class=default_class, progress_callback=job.report_progress)
+            if report.errors:
+                report.write_errors(os.path.splitext(path)[0] + "_import_errors.csv")
+            return report
+
+        def done(report):
+            message = f"Imported {report.imported} students."
+            if report.errors:
+                message += f"\n{report.failed} rows skipped, see:\n{report.error_file}"
+            show_popup("Import Finished", message)
+
+        # Progress is in bytes (CSV) or sheet rows (XLSX), so show a percentage
+        run_in_background("Importing Students", run, done,
+                          describe_progress=lambda read, size: f"{read * 100 // max(size, 1)}% read")
+
     def go_back(self):
         self.manager.current = 'class_management'
 
 
 class StudentDetailScreen(Screen):
+    builder = None
+    page_size = 50
+    _payment_pages = None
+
     def on_enter(self):
+        if self.builder is not None:
+            self.builder.cancel()
         app = App.get_running_app()
-        std_id = app.selected_student_id
-        student = db.get_student_by_id(std_id)
-        if not student:
+        profile = db.get_student_profile(app.selected_student_id)
+        if not profile:
             return
+        student = profile.student
 
         # Personal details
         grid = self.ids.personal_details_grid
@@ -214,7 +433,7 @@ class StudentDetailScreen(Screen):
         grid.add_widget(Label(text=student[7]))
         
         # Exam Summary
-        tot, att, msd = db.get_student_exam_stats(std_id, student[7])
+        tot, att, msd = profile.exam_stats
         egrid = self.ids.exam_summary_grid
         egrid.clear_widgets()
         egrid.add_widget(Label(text="Total Exams:"))
@@ -224,33 +443,48 @@ class StudentDetailScreen(Screen):
         egrid.add_widget(Label(text="Missed:"))
         egrid.add_widget(Label(text=str(msd)))
 
+        # The history lists can be long; they are built over the next frames
+        self.builder = IncrementalBuilder()
+
         # Recent exams
         elist = self.ids.exam_list_grid
         elist.clear_widgets()
-        marks = db.get_marks_for_student(std_id)
-        for m in marks:
-            # m: exam_name, total_marks, obtained_marks, exam_date, class_name
-            text = f"{m[0]}: {m[2]}/{m[1]} ({m[3]})"
-            elist.add_widget(Label(text=text, size_hint_y=None, height=dp(30)))
-
-        # Payments
-        plist = self.ids.payment_list_grid
-        plist.clear_widgets()
-        payments = db.get_payments_for_student(std_id)
-        for p in payments:
-            # p: id, std_id, class, month, year, amount, status
-            text = f"{p[3]} {p[4]} - {p[6].upper()} (Amt: {p[5]})"
-            col = (0.2, 0.8, 0.2, 1) if p[6] == 'paid' else (0.8, 0.2, 0.2, 1)
-            lbl = Label(text=text, size_hint_y=None, height=dp(30), color=col)
-            plist.add_widget(lbl)
+        self.builder.add(elist, profile.marks, self.exam_row)
+
+        # Payments, a page at a time as the screen is scrolled down
+        self.ids.payment_list_grid.clear_widgets()
+        std_id = student[1]
+        if self._payment_pages is None:
+            self._payment_pages = PagedLoader(self.ids.detail_scroll, None, self.add_payments)
+        self._payment_pages.reset(lambda after: db.get_payments_for_student_page(std_id, self.page_size, after))
 
         # Promotion History
         phlist = self.ids.promotion_list_grid
         phlist.clear_widgets()
-        history = db.get_promotion_history(std_id)
-        for h in history:
-            text = f"{h[4]}: {h[2]} -> {h[3]} | Summary: {h[5]}"
-            phlist.add_widget(Label(text=text, size_hint_y=None, height=dp(30)))
+        self.builder.add(phlist, profile.promotion_history, self.promotion_row)
+
+    def on_leave(self):
+        if self.builder is not None:
+            self.builder.cancel()
+
+    def add_payments(self, payments):
+        self.builder.add(self.ids.payment_list_grid, payments, self.payment_row)
+
+    def exam_row(self, m):
+        # m: exam_name, total_marks, obtained_marks, exam_date, class_name
+        text = f"{m[0]}: {m[2]}/{m[1]} ({m[3]})"
+        return [Label(text=text, size_hint_y=None, height=dp(30))]
+
+    def payment_row(self, p):
+        # p: id, std_id, class, month, year, amount, status
+        text = f"{p[3]} {p[4]} - {p[6].upper()} (Amt: {p[5]})"
+        col = (0.2, 0.8, 0.2, 1) if p[6] == 'paid' else (0.8, 0.2, 0.2, 1)
+        return [Label(text=text, size_hint_y=None, height=dp(30), color=col)]
+
+    def promotion_row(self, h):
+        # h: id, std_id, year, from_class, to_class, summary
+        text = f"{h[2]}: {h[3]} -> {h[4]} | Summary: {h[5]}"
+        return [Label(text=text, size_hint_y=None, height=dp(30))]
 
     def go_back(self):
         # We need to detect if coming from search or class management
@@ -294,72 +528,165 @@ class AddExamScreen(Screen):
         self.manager.current = 'class_management'
 
 
+class MarksRow(RecycleDataViewBehavior, BoxLayout):
+    # One recycled row of the marks sheet; see marks.kv. Edits are written back
+    # into the RecycleView data so they survive the row being reused.
+    student_id = StringProperty('')
+    student_name = StringProperty('')
+    marks_text = StringProperty('')
+    saved = None
+    rv = None
+    index = 0
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.rv = rv
+        self.index = index
+        return super().refresh_view_attrs(rv, index, data)
+
+    def update_marks(self, text):
+        self.marks_text = text
+        if self.rv is not None and self.index < len(self.rv.data):
+            self.rv.data[self.index]['marks_text'] = text
+
+
 class MarksEntryScreen(Screen):
     def on_enter(self):
         app = App.get_running_app()
         exam_id = app.selected_exam_id
-        db.cursor.execute("SELECT exam_name, class_name FROM Exams WHERE exam_id = ?", (exam_id,))
-        exam = db.cursor.fetchone()
+        exam = db.get_exam(exam_id)
         if not exam:
             return
         
-        self.ids.title_label.text = f"{exam[1]} - {exam[0]}"
-        
-        # Load students
-        self.student_inputs = {}
-        grid = self.ids.students_marks_list
-        grid.clear_widgets()
+        # exam: exam_id, class_name, exam_name, total_marks, exam_date
+        self.ids.title_label.text = f"{exam[1]} - {exam[2]}"
         
+        # Load students; 'saved' is the mark as stored (None = absent), to
+        # tell which cells were edited
         students = db.get_marks_by_exam(exam_id)
-        for s in students:
-            # s: id, name, obtained_marks
-            row = BoxLayout(size_hint_y=None, height=dp(40), spacing=5)
-            row.add_widget(Label(text=s[0], size_hint_x=0.25))
-            row.add_widget(Label(text=s[1], size_hint_x=0.4))
-            
-            inp = TextInput(text=str(s[2]) if s[2] is not None else "", multiline=False, input_filter='float', size_hint_x=0.35)
-            self.student_inputs[s[0]] = inp
-            row.add_widget(inp)
-            grid.add_widget(row)
-
-    def save_all_marks(self):
-        app = App.get_running_app()
-        exam_id = app.selected_exam_id
-        for std_id, inp in self.student_inputs.items():
-            if inp.text.strip():
+        # s: id, name, obtained_marks
+        self.ids.students_marks_list.data = [
+            {'student_id': s[0], 'student_name': s[1], 'marks_text': str(s[2]) if s[2] is not None else "",
+             'saved': s[2]}
+            for s in students
+        ]
+
+    def changed_marks(self):
+        """({student_id: mark or None}, invalid) for the cells that differ from what
+        is saved; blank means absent. invalid lists (student name, text) of the
+        cells that are not a number."""
+        changed = {}
+        invalid = []
+        for row in self.ids.students_marks_list.data:
+            text = row['marks_text'].strip()
+            if text:
                 try:
-                    marks = float(inp.text.strip())
-                    db.add_or_update_mark(std_id, exam_id, marks)
+                    marks = float(text)
                 except ValueError:
-                    pass
-        show_popup("Success", "Marks saved successfully.")
+                    invalid.append((row['student_name'], text))
+                    continue
+            else:
+                marks = None
+            if marks != row['saved']:
+                changed[row['student_id']] = marks
+        return changed, invalid
+
+    def save_all_marks(self, notify=True):
+        """Save the changed marks and return how many were written. Nothing is
+        saved while a cell is not a number; that shows an error and returns None."""
+        app = App.get_running_app()
+        changed, invalid = self.changed_marks()
+        if invalid:
+            lines = [f"{name}: '{text}'" for name, text in invalid[:10]]
+            if len(invalid) > 10:
+                lines.append(f"... and {len(invalid) - 10} more")
+            show_popup("Invalid Marks", "Nothing was saved. Fix these marks first:\n" + "\n".join(lines))
+            return None
+        written = db.save_marks_bulk(app.selected_exam_id, changed)
+        for row in self.ids.students_marks_list.data:
+            if row['student_id'] in changed:
+                row['saved'] = changed[row['student_id']]
+        if notify:
+            if written:
+                show_popup("Success", f"Saved {written} changed mark{'s' if written != 1 else ''}.")
+            else:
+                show_popup("Marks", "No changes to save.")
+        return written
 
     def generate_pdf(self):
-        self.save_all_marks() # save first
+        if self.save_all_marks(notify=False) is None: # save any edits first
+            return
         app = App.get_running_app()
-        filepath = generate_exam_result_pdf(app.selected_exam_id, db)
+        exam_id = app.selected_exam_id
+
+        def build(job):
+            # The worker reads through its own read-only connection
+            reader = db.reader()
+            try:
+                return pdf.generate_exam_result_pdf(exam_id, reader, progress_callback=job.report_progress)
+            finally:
+                reader.close()
+
+        self.pdf_job = run_in_background("Generating PDF", build, self.on_pdf_generated)
+
+    def on_pdf_generated(self, filepath):
         if filepath:
             show_popup("PDF Generated", f"Saved successfully at:\n{filepath}")
         else:
             show_popup("Error", "Could not generate PDF.")
-            
+
     def go_back(self):
         self.manager.current = 'class_management'
 
 
-class PaymentScreen(Screen):
+class StudentSearchMixin:
+    """Debounced search-as-you-type rendering matches into search_results_container."""
+    search_delay = 0.25
+    search_limit = 20
+    _search_event = None
+
+    def schedule_search(self, text):
+        if self._search_event is not None:
+            self._search_event.cancel()
+        self._search_event = Clock.schedule_once(lambda dt: self.show_matches(text), self.search_delay)
+
+    def show_matches(self, text):
+        container = self.ids.search_results_container
+        container.clear_widgets()
+        q = text.strip()
+        if not q:
+            return []
+        students = db.search_students(q, self.search_limit)
+        for s in students:
+            btn = Button(text=f"{s[1]} - {s[2]} ({s[7]})  {s[5] or ''}", size_hint_y=None, height=dp(40))
+            btn.bind(on_release=lambda instance, std_id=s[1]: self.select_student(std_id))
+            container.add_widget(btn)
+        return students
+
+
+class PaymentScreen(StudentSearchMixin, Screen):
     def search_student(self):
         q = self.ids.search_input.text.strip()
         student = db.get_student_by_id(q)
+        if not student:
+            matches = self.show_matches(q)
+            if len(matches) == 1:
+                student = matches[0]
         if student:
-            self.current_student = student
-            self.ids.student_info_label.text = f"Selected: {student[2]} ({student[1]}) - Class: {student[7]}"
-            self.ids.amount_input.text = str(db.get_class_fee(student[7]))
-            self.load_history()
+            self.select_student(student[1])
         else:
-            from datetime import datetime
             self.current_student = None
-            self.ids.student_info_label.text = "Student not found."
+            self.ids.student_info_label.text = "Student not found." if q else "Select a student to manage payments"
+
+    def select_student(self, std_id):
+        profile = db.get_student_profile(std_id)
+        if not profile:
+            return
+        student = profile.student
+        self.ids.search_results_container.clear_widgets()
+        self.current_student = student
+        self.ids.student_info_label.text = f"Selected: {student[2]} ({student[1]}) - Class: {student[7]}"
+        self.ids.amount_input.text = str(profile.class_fee)
+        self.load_history()
 
     def mark_paid(self):
         if not hasattr(self, 'current_student') or not self.current_student:
@@ -383,12 +710,20 @@ class PaymentScreen(Screen):
         show_popup("Success", "Payment recorded successfully.")
         self.load_history()
 
+    page_size = 50
+    _pages = None
+
     def load_history(self):
         if not hasattr(self, 'current_student') or not self.current_student:
             return
+        self.ids.payment_history_list.clear_widgets()
+        std_id = self.current_student[1]
+        if self._pages is None:
+            self._pages = PagedLoader(self.ids.payment_history_scroll, None, self.add_history)
+        self._pages.reset(lambda after: db.get_payments_for_student_page(std_id, self.page_size, after))
+
+    def add_history(self, payments):
         grid = self.ids.payment_history_list
-        grid.clear_widgets()
-        payments = db.get_payments_for_student(self.current_student[1])
         for p in payments:
             col = (0.2, 0.8, 0.2, 1) if p[6] == 'paid' else (0.8, 0.2, 0.2, 1)
             row = BoxLayout(size_hint_y=None, height=dp(30))
@@ -402,52 +737,112 @@ class PromotionScreen(Screen):
     def promote_class(self):
         old_class = self.ids.old_class_spinner.text
         new_class = self.ids.new_class_spinner.text
-        
-        students = db.get_students_by_class(old_class)
-        if not students:
+        if old_class == new_class:
+            show_popup("Error", "Old and new class must be different.")
+            return
+
+        count = db.promote_class(old_class, new_class)
+        if not count:
             show_popup("Info", f"No active students found in {old_class}.")
             return
-            
-        for s in students:
-            db.promote_student(s[1], new_class, f"Promoted from {old_class} to {new_class}")
-            
-        show_popup("Success", f"Promoted {len(students)} students from {old_class} to {new_class}.")
 
+        show_popup("Success", f"Promoted {count} students from {old_class} to {new_class}.")
+
+    def preview_promotion(self):
+        old_class = self.ids.old_class_spinner.text
+        new_class = self.ids.new_class_spinner.text
+        count = db.promote_class(old_class, new_class, dry_run=True)
+        self.ids.preview_label.text = f"{count} active students would move from {old_class} to {new_class}."
+
+    def promote_all_classes(self):
+        plan = db.promote_all_classes(dry_run=True)
+        if not any(count for _, _, count in plan):
+            show_popup("Info", "No active students to promote.")
+            return
 
-class SearchScreen(Screen):
+        layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
+        summary = "\n".join(f"{old} -> {new}: {count}" for old, new, count in plan)
+        layout.add_widget(Label(text=summary))
+        buttons = BoxLayout(size_hint_y=None, height=dp(40), spacing=10)
+        btn_confirm = Button(text="Promote All", background_color=(0.1, 0.6, 0.1, 1))
+        btn_cancel = Button(text="Cancel")
+        buttons.add_widget(btn_confirm)
+        buttons.add_widget(btn_cancel)
+        layout.add_widget(buttons)
+
+        popup = Popup(title="Confirm Year-End Promotion", content=layout, size_hint=(0.8, 0.7))
+        btn_cancel.bind(on_release=popup.dismiss)
+        btn_confirm.bind(on_release=lambda x: self._confirm_promote_all(popup))
+        popup.open()
+
+    def _confirm_promote_all(self, popup):
+        popup.dismiss()
+        results = db.promote_all_classes()
+        total = sum(count for _, _, count in results)
+        self.ids.preview_label.text = ""
+        show_popup("Success", f"Promoted {total} students across {len(results)} classes.")
+
+
+class SearchScreen(StudentSearchMixin, Screen):
     def perform_search(self):
         q = self.ids.search_input.text.strip()
         student = db.get_student_by_id(q)
-        if not student:
-            self.ids.status_label.text = "Student not found!"
-            self.ids.search_results_container.clear_widgets()
+        if student:
+            self.select_student(student[1])
             return
-        
+
+        matches = self.show_matches(q)
+        if len(matches) == 1:
+            self.select_student(matches[0][1])
+
+    def show_matches(self, text):
+        matches = super().show_matches(text)
+        self.ids.status_label.text = "" if matches or not text.strip() else "Student not found!"
+        return matches
+
+    def select_student(self, std_id):
         self.ids.status_label.text = ""
         app = App.get_running_app()
-        app.selected_student_id = student[1]
+        app.selected_student_id = std_id
         self.manager.current = 'student_detail'
 
 
 class SettingsScreen(Screen):
+    builder = None
+
     def on_enter(self):
+        if self.builder is not None:
+            self.builder.cancel()
         self.inputs = {}
+        self.refresh_backups()
         grid = self.ids.fee_grid
         grid.clear_widgets()
-        
-        classes = db.get_classes()
-        for c in classes:
-            grid.add_widget(Label(text=c[1]))
-            grid.add_widget(Label(text="Monthly Fee:"))
-            inp = TextInput(text=str(c[2]), multiline=False, input_filter='float')
-            self.inputs[c[1]] = inp
-            grid.add_widget(inp)
+
+        # One row of fee inputs per class, built over the next frames
+        self.builder = IncrementalBuilder().add(grid, db.get_classes(), self.fee_row, placeholder=False)
+        self.refresh_diagnostics()
+
+    def on_leave(self):
+        if self.builder is not None:
+            self.builder.cancel()
+
+    def fee_row(self, c):
+        inp = TextInput(text=str(c[2]), multiline=False, input_filter='float')
+        self.inputs[c[1]] = inp
+        return [Label(text=c[1]), Label(text="Monthly Fee:"), inp]
 
     def save_fees(self):
+        # Only the fees that were changed, in one transaction
+        current = {c[1]: c[2] for c in db.get_classes()}
+        fees = {}
         for class_name, inp in self.inputs.items():
-            if inp.text.strip():
-                db.update_class_fee(class_name, float(inp.text.strip()))
-        show_popup("Success", "Class fees updated successfully.")
+            text = inp.text.strip()
+            if text and float(text) != current.get(class_name):
+                fees[class_name] = float(text)
+        if db.update_class_fees(fees):
+            show_popup("Success", f"Updated the fee of {len(fees)} class{'es' if len(fees) != 1 else ''}.")
+        else:
+            show_popup("Fees", "No fee changes to save.")
 
     def update_password(self):
         new_pwd = self.ids.new_password_input.text.strip()
@@ -458,15 +853,121 @@ class SettingsScreen(Screen):
         else:
             show_popup("Error", "Password must be at least 4 characters long.")
 
+    # --- Backups ---
+    def refresh_backups(self):
+        last = db.get_setting('last_backup_at')
+        count = len(backup.list_backups())
+        self.ids.backup_status_label.text = (f"Last backup: {last.replace('T', ' ') if last else 'never'}  |  "
+                                             f"{count} kept in {os.path.abspath(backup.BACKUP_DIR)}")
+        nightly = db.get_setting('nightly_backup') == 'on'
+        self.ids.nightly_backup_button.text = f"Nightly Backup: {'On' if nightly else 'Off'}"
+
+    def backup_now(self):
+        def done(path):
+            self.refresh_backups()
+            show_popup("Backup Finished", f"Backup saved to:\n{path}")
+
+        run_in_background("Backing Up", backup_database, done)
+
+    def toggle_nightly_backup(self):
+        nightly = db.get_setting('nightly_backup') == 'on'
+        db.set_setting('nightly_backup', 'off' if nightly else 'on')
+        self.refresh_backups()
+
+    def choose_backup(self):
+        paths = backup.list_backups()
+        if not paths:
+            show_popup("Restore", "No backups found.")
+            return
+        content = BoxLayout(orientation='vertical', spacing=5, padding=5)
+        scroll = ScrollView()
+        listing = GridLayout(cols=1, spacing=5, size_hint_y=None)
+        listing.bind(minimum_height=listing.setter('height'))
+        popup = Popup(title="Restore Backup", content=content, size_hint=(0.9, 0.8))
+        for path in paths:
+            btn = Button(text=os.path.basename(path), size_hint_y=None, height=dp(40))
+            btn.bind(on_release=lambda instance, p=path: (popup.dismiss(), self.confirm_restore(p)))
+            listing.add_widget(btn)
+        scroll.add_widget(listing)
+        content.add_widget(scroll)
+        close_btn = Button(text="Cancel", size_hint_y=None, height=dp(40))
+        close_btn.bind(on_release=popup.dismiss)
+        content.add_widget(close_btn)
+        popup.open()
+
+    def confirm_restore(self, path):
+        content = BoxLayout(orientation='vertical', padding=10, spacing=10)
+        content.add_widget(Label(text=f"Replace all current data with\n{os.path.basename(path)}?\n"
+                                      f"The current data is backed up first.", halign='center'))
+        buttons = BoxLayout(size_hint_y=None, height=dp(40), spacing=10)
+        yes_btn = Button(text="Restore", background_color=(0.8, 0.2, 0.2, 1))
+        no_btn = Button(text="Cancel")
+        buttons.add_widget(yes_btn)
+        buttons.add_widget(no_btn)
+        content.add_widget(buttons)
+        popup = Popup(title="Confirm Restore", content=content, size_hint=(0.8, 0.5))
+        yes_btn.bind(on_release=lambda x: (popup.dismiss(), self.restore(path)))
+        no_btn.bind(on_release=popup.dismiss)
+        popup.open()
+
+    def restore(self, path):
+        def run(job):
+            return backup.restore_backup(db.db_name, path, progress_callback=job.report_progress)
+
+        def done(safety_path):
+            # The snapshot may predate later migrations; cached profiles are stale
+            # (create_tables also reloads the cached classes and exams)
+            db.create_tables()
+            db.invalidate_profiles()
+            self.refresh_backups()
+            show_popup("Restore Finished", f"Data restored from {os.path.basename(path)}.\n"
+                                           f"Previous data saved as {os.path.basename(safety_path)}")
+
+        run_in_background("Restoring Backup", run, done)
+
+    # --- Diagnostics ---
+    def refresh_diagnostics(self):
+        stats = query_stats.snapshot()
+        self.ids.query_stats_button.text = "Disable Query Stats" if stats["enabled"] else "Enable Query Stats"
+        totals = stats["totals"]
+        lines = [
+            f"Query stats {'on' if stats['enabled'] else 'off'} since {stats['since']} "
+            f"(slow >= {stats['slow_threshold_ms']:g} ms)",
+            f"Total: {totals['calls']} queries, {totals['ms']:.1f} ms, {totals['rows']} rows",
+        ]
+        for title, key in (("By screen", "by_screen"), ("By method", "by_method")):
+            if stats[key]:
+                lines.append(f"{title}:")
+                lines += [f"    {r['name']}: {r['calls']} queries, {r['ms']:.1f} ms, {r['rows']} rows"
+                          for r in stats[key][:8]]
+        if stats["slow_queries"]:
+            lines.append("Recent slow queries:")
+            lines += [f"    {q['ms']:.1f} ms  {q['method']} @ {q['screen']}: {q['sql'][:80]}"
+                      for q in stats["slow_queries"][:5]]
+        self.ids.diagnostics_label.text = "\n".join(lines)
+
+    def toggle_query_stats(self):
+        query_stats.enable(not query_stats.enabled)
+        db.reset_cursor()
+        self.refresh_diagnostics()
+
+    def reset_query_stats(self):
+        query_stats.reset()
+        self.refresh_diagnostics()
+
+    def save_query_stats(self):
+        path = query_stats.dump_json()
+        show_popup("Saved", f"Query stats written to:\n{path}")
+
 
 class EditStudentScreen(Screen):
     def on_enter(self):
         app = App.get_running_app()
-        std_id = app.selected_student_id
-        student = db.get_student_by_id(std_id)
-        if not student:
+        profile = db.get_student_profile(app.selected_student_id)
+        if not profile:
             return
-            
+        student = profile.student
+
         self.ids.name_input.text = student[2]
         self.ids.father_name_input.text = student[3] or ""
         self.ids.mother_name_input.text = student[4] or ""
@@ -500,11 +1001,289 @@ class EditStudentScreen(Screen):
 
 class ReportsScreen(Screen):
     def on_enter(self):
-        self.ids.total_students_label.text = str(db.get_total_students())
-        self.ids.total_batches_label.text = str(db.get_total_batches())
-        self.ids.total_exams_label.text = str(db.get_total_exams())
-        self.ids.total_revenue_label.text = f"${db.get_total_revenue():.2f}"
-        self.ids.total_payments_label.text = str(db.get_total_payments())
+        stats = db.get_dashboard_stats()
+        self.ids.total_students_label.text = str(stats["total_students"])
+        self.ids.total_batches_label.text = str(stats["total_batches"])
+        self.ids.total_exams_label.text = str(stats["total_exams"])
+        self.ids.total_revenue_label.text = f"${stats['total_revenue']:.2f}"
+        self.ids.total_payments_label.text = str(stats["total_payments"])
+
+    def export_data(self, compress):
+        def run(job):
+            reader = db.reader()
+            try:
+                return export_all(reader, compress=compress, progress_callback=job.report_progress)
+            finally:
+                reader.close()
+
+        def done(files):
+            folder = os.path.dirname(files[0]) if files else ""
+            show_popup("Export Finished", f"{len(files)} files written to:\n{folder}")
+
+        run_in_background("Exporting Data", run, done)
+
+
+class AnalyticsRow(RecycleDataViewBehavior, BoxLayout):
+    # One recycled row of the analytics student table; see analytics.kv
+    rank = StringProperty('')
+    student_name = StringProperty('')
+    average = StringProperty('')
+    trend = StringProperty('')
+    absentee = StringProperty('')
+
+
+class AnalyticsScreen(Screen):
+    def on_enter(self):
+        classes = [c[1] for c in db.get_classes()]
+        spinner = self.ids.class_spinner
+        spinner.values = classes
+        if spinner.text not in classes:
+            spinner.text = classes[0] if classes else 'Select Class'
+        self.load_class(spinner.text)
+
+    def load_class(self, class_name):
+        exam_grid = self.ids.exam_summary_grid
+        exam_grid.clear_widgets()
+        self.ids.student_stats_list.data = []
+        if class_name == 'Select Class':
+            return
+        result = analytics.analyze_class(db, class_name)
+
+        grades = analytics.GRADES
+        for e in result.exam_summaries():
+            spread = "  ".join(f"{g}:{e['grades'][g]}" for g in grades if e['grades'][g])
+            text = (f"{e['exam_name']} ({e['exam_date']}) - Present {e['present']}, Absent {e['absent']} | "
+                    f"Avg {e['mean']:.1f}/{e['total_marks']:g}, SD {e['std']:.1f}, High {e['highest']:g}"
+                    f"{' | ' + spread if spread else ''}")
+            exam_grid.add_widget(Label(text=text, size_hint_y=None, height=dp(30), color=(0.1, 0.1, 0.1, 1)))
+        if not result.exams:
+            exam_grid.add_widget(Label(text="No exams for this class yet.", size_hint_y=None, height=dp(30),
+                                       color=(0.1, 0.1, 0.1, 1)))
+
+        def trend(slope):
+            if slope is None:
+                return "-"
+            return f"{slope:+.1f} pts/exam"
+
+        self.ids.student_stats_list.data = [
+            {
+                'rank': str(s['rank']) if s['rank'] else "-",
+                'student_name': f"{s['name']} ({s['student_id']})",
+                'average': f"{s['average_percent']:.1f}%" if s['average_percent'] is not None else "N/A",
+                'trend': trend(s['trend_slope']),
+                'absentee': f"{s['absentee_rate'] * 100:.0f}%",
+            }
+            for s in result.student_summaries()
+        ]
+
+
+class DefaulterRow(RecycleDataViewBehavior, BoxLayout):
+    # One recycled row of the defaulters report; see defaulters.kv
+    student_id = StringProperty('')
+    student_name = StringProperty('')
+    mobile = StringProperty('')
+    months_due = StringProperty('')
+    amount_due = StringProperty('')
+
+
+class DefaultersScreen(Screen):
+    all_classes = 'All Classes'
+
+    def on_enter(self):
+        self.ids.class_spinner.values = [self.all_classes] + [c[1] for c in db.get_classes()]
+        self.load_defaulters()
+
+    def load_defaulters(self):
+        class_name = self.ids.class_spinner.text
+        if class_name == self.all_classes:
+            class_name = None
+        month_from = self.ids.from_input.text.strip() or None
+        month_to = self.ids.to_input.text.strip() or None
+        try:
+            rows = db.get_defaulters(class_name, month_from, month_to)
+        except ValueError as e:
+            show_popup("Error", f"{e}\nUse YYYY-MM for the months.")
+            return
+
+        total = sum(r[5] for r in rows)
+        self.ids.summary_label.text = f"{len(rows)} students owe {total:.2f} in total"
+        self.ids.defaulters_list.data = [
+            {
+                'student_id': r[0],
+                'student_name': f"{r[1]} ({r[2]})",
+                'mobile': r[3] or "",
+                'months_due': str(r[4]),
+                'amount_due': f"{r[5]:.2f}",
+            }
+            for r in rows
+        ]
+
+    def collect_payment(self, std_id):
+        self.manager.get_screen('payment').select_student(std_id)
+        self.manager.current = 'payment'
+
+
+class BarChart(Widget):
+    """Grouped bar chart drawn on the canvas: one bar per series in each group.
+
+    series is a list of equal-length value lists and colors one rgba per series.
+    Labels under the bars are left to the layout around the chart.
+    """
+    series = ListProperty([])
+    colors = ListProperty([(0.2, 0.5, 0.8, 1), (0.7, 0.7, 0.7, 1)])
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.bind(pos=self.redraw, size=self.redraw, series=self.redraw, colors=self.redraw)
+
+    def redraw(self, *args):
+        self.canvas.clear()
+        groups = max((len(values) for values in self.series), default=0)
+        peak = max((v for values in self.series for v in values), default=0)
+        if not groups or peak <= 0:
+            return
+        group_width = self.width / groups
+        bar_width = group_width * 0.8 / len(self.series)
+        with self.canvas:
+            for s, values in enumerate(self.series):
+                Color(*self.colors[s % len(self.colors)])
+                for i, value in enumerate(values):
+                    x = self.x + i * group_width + group_width * 0.1 + s * bar_width
+                    Rectangle(pos=(x, self.y), size=(bar_width, self.height * value / peak))
+
+
+class RevenueScreen(Screen):
+    all_classes = 'All Classes'
+
+    def on_enter(self):
+        this_year = date.today().year
+        years = {this_year} | {row[0] for row in db.get_yearly_revenue()}
+        self.ids.class_spinner.values = [self.all_classes] + [c[1] for c in db.get_classes()]
+        self.ids.year_spinner.values = [str(y) for y in sorted(years, reverse=True)]
+        if self.ids.year_spinner.text not in self.ids.year_spinner.values:
+            # The spinner's on_text loads the charts
+            self.ids.year_spinner.text = str(this_year)
+        else:
+            self.load_revenue()
+
+    def load_revenue(self):
+        year = int(self.ids.year_spinner.text)
+        class_name = self.ids.class_spinner.text
+        if class_name == self.all_classes:
+            class_name = None
+
+        # Month by month against the year before, from the monthly rollup
+        months = db.get_monthly_revenue(f"{year - 1}-01", f"{year}-12", class_name)
+        previous, current = months[:12], months[12:]
+        self.ids.monthly_chart.series = [[r[2] for r in current], [r[2] for r in previous]]
+        total, last_total = sum(r[2] for r in current), sum(r[2] for r in previous)
+        change = f" ({(total - last_total) / last_total * 100:+.1f}% vs {year - 1})" if last_total else ""
+        self.ids.monthly_summary_label.text = (f"{year}: {total:.2f} from {sum(r[3] for r in current)} payments"
+                                               f"{change}  |  {year - 1}: {last_total:.2f}")
+
+        yearly = db.get_yearly_revenue(class_name=class_name)
+        self.ids.yearly_chart.series = [[r[1] for r in yearly]]
+        labels = self.ids.yearly_labels
+        labels.clear_widgets()
+        for r in yearly:
+            labels.add_widget(Label(text=str(r[0]), font_size='12sp'))
+
+        grid = self.ids.class_revenue_grid
+        grid.clear_widgets()
+        for c in db.get_class_revenue(f"{year}-01", f"{year}-12"):
+            grid.add_widget(Label(text=c[0], size_hint_y=None, height=dp(30)))
+            grid.add_widget(Label(text=f"{c[1]:.2f}", size_hint_y=None, height=dp(30)))
+            grid.add_widget(Label(text=f"{c[2]} payments", size_hint_y=None, height=dp(30)))
+
+
+# Screen name -> (Screen class, kv file in kv/). Each screen and its kv rules
+# are only built the first time it is navigated to.
+SCREENS = {
+    'login': (LoginScreen, 'login.kv'),
+    'dashboard': (DashboardScreen, 'dashboard.kv'),
+    'batch_list': (BatchListScreen, 'batch_list.kv'),
+    'class_management': (ClassManagementScreen, 'class_management.kv'),
+    'add_student': (AddStudentScreen, 'add_student.kv'),
+    'student_detail': (StudentDetailScreen, 'student_detail.kv'),
+    'add_exam': (AddExamScreen, 'exam.kv'),
+    'marks_entry': (MarksEntryScreen, 'marks.kv'),
+    'payment': (PaymentScreen, 'payment.kv'),
+    'promotion': (PromotionScreen, 'promotion.kv'),
+    'search': (SearchScreen, 'search.kv'),
+    'settings': (SettingsScreen, 'settings.kv'),
+    'edit_student': (EditStudentScreen, 'edit_student.kv'),
+    'reports': (ReportsScreen, 'reports.kv'),
+    'analytics': (AnalyticsScreen, 'analytics.kv'),
+    'defaulters': (DefaultersScreen, 'defaulters.kv'),
+    'revenue': (RevenueScreen, 'revenue.kv'),
+}
+
+# Screens likely to be opened next from a given screen; built in idle frames
+# after it is shown so the first tap on them does not pay the build cost
+PREWARM = {
+    'login': ['dashboard'],
+    'dashboard': ['batch_list', 'search', 'payment'],
+    'batch_list': ['class_management'],
+    'class_management': ['student_detail', 'marks_entry', 'add_student'],
+    'student_detail': ['edit_student'],
+}
+
+
+class LazyScreenManager(ScreenManager):
+    """ScreenManager that loads a screen's kv file and builds it on first use."""
+    # Seconds to wait after a screen change before prewarming, then between screens
+    prewarm_delay = 0.5
+
+    def __init__(self, registry, kv_dir, prewarm=None, **kwargs):
+        self.registry = registry
+        self.kv_dir = kv_dir
+        self.prewarm = prewarm or {}
+        self._loaded_kv = set()
+        self._prewarm_queue = []
+        self._prewarm_event = None
+        super().__init__(**kwargs)
+        self.bind(current=self._on_current)
+
+    def _on_current(self, instance, name):
+        # Queries from here on are attributed to this screen
+        query_stats.set_screen(name)
+        self.schedule_prewarm(name)
+
+    def get_screen(self, name):
+        if not self.has_screen(name) and name in self.registry:
+            self.build_screen(name)
+        return super().get_screen(name)
+
+    def build_screen(self, name):
+        start = time.perf_counter()
+        screen_cls, kv_file = self.registry[name]
+        if kv_file not in self._loaded_kv:
+            Builder.load_file(os.path.join(self.kv_dir, kv_file))
+            self._loaded_kv.add(kv_file)
+        screen = screen_cls(name=name)
+        self.add_widget(screen)
+        Logger.debug(f"Screens: built '{name}' in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return screen
+
+    def build_all(self):
+        for name in self.registry:
+            if not self.has_screen(name):
+                self.build_screen(name)
+
+    def schedule_prewarm(self, name):
+        self._prewarm_queue = [n for n in self.prewarm.get(name, []) if not self.has_screen(n)]
+        if self._prewarm_queue and self._prewarm_event is None:
+            self._prewarm_event = Clock.schedule_once(self._prewarm_next, self.prewarm_delay)
+
+    def _prewarm_next(self, dt):
+        self._prewarm_event = None
+        while self._prewarm_queue:
+            name = self._prewarm_queue.pop(0)
+            if not self.has_screen(name):
+                self.build_screen(name)
+                break
+        if self._prewarm_queue:
+            self._prewarm_event = Clock.schedule_once(self._prewarm_next, self.prewarm_delay)
 
 
 class CoachingManagerApp(App):
@@ -513,30 +1292,44 @@ class CoachingManagerApp(App):
     selected_student_id = None
     selected_exam_id = None
 
-    def build(self):
-        # Load all KV files mapped earlier
-        kv_path = './kv/'
-        if os.path.exists(kv_path):
-            for kv_file in os.listdir(kv_path):
-                if kv_file.endswith('.kv'):
-                    Builder.load_file(os.path.join(kv_path, kv_file))
-
-        sm = ScreenManager()
-        sm.add_widget(LoginScreen(name='login'))
-        sm.add_widget(DashboardScreen(name='dashboard'))
-        sm.add_widget(BatchListScreen(name='batch_list'))
-        sm.add_widget(ClassManagementScreen(name='class_management'))
-        sm.add_widget(AddStudentScreen(name='add_student'))
-        sm.add_widget(StudentDetailScreen(name='student_detail'))
-        sm.add_widget(AddExamScreen(name='add_exam'))
-        sm.add_widget(MarksEntryScreen(name='marks_entry'))
-        sm.add_widget(PaymentScreen(name='payment'))
-        sm.add_widget(PromotionScreen(name='promotion'))
-        sm.add_widget(SearchScreen(name='search'))
-        sm.add_widget(SettingsScreen(name='settings'))
-        sm.add_widget(EditStudentScreen(name='edit_student'))
-        sm.add_widget(ReportsScreen(name='reports'))
+    # Seconds between checks for a due nightly backup
+    backup_check_interval = 1800
+    _backup_job = None
 
+    def check_nightly_backup(self, dt=None):
+        """Start a silent background backup if nightly backups are on and none was made today."""
+        if self._backup_job is not None and self._backup_job.running:
+            return
+        if db.get_setting('nightly_backup') != 'on':
+            return
+        last = db.get_setting('last_backup_at') or ''
+        if last[:10] == date.today().isoformat():
+            return
+        self._backup_job = BackgroundJob(
+            backup_database,
+            on_complete=lambda path: Logger.info(f"Backup: nightly backup saved to {path}"),
+            on_error=lambda e: Logger.warning(f"Backup: nightly backup failed: {e}"),
+        ).start()
+
+    def build(self):
+        startup_profiler.mark("build() start")
+        start = time.perf_counter()
+        # Imported here rather than at module level: importing it opens the
+        # window, and spawned render workers re-import this module
+        from kivy.core.window import Window
+        # Set light background
+        Window.clearcolor = (0.95, 0.95, 0.95, 1)
+        kv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'kv')
+        sm = LazyScreenManager(SCREENS, kv_path, PREWARM)
+        if os.environ.get('COACHING_EAGER_SCREENS'):
+            # Old behaviour, for comparing startup times
+            sm.build_all()
+        sm.current = 'login'
+        # First check once startup has settled, then periodically
+        Clock.schedule_once(self.check_nightly_backup, 60)
+        Clock.schedule_interval(self.check_nightly_backup, self.backup_check_interval)
+        startup_profiler.mark("build() end")
+        Logger.info(f"Startup: build() took {(time.perf_counter() - start) * 1000:.0f} ms")
         return sm
 
 
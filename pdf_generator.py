@@ -2,6 +2,8 @@ import os
 from datetime import datetime
 from fpdf import FPDF
 
+import analytics
+
 class PDF(FPDF):
     def __init__(self, exam_name):
         super().__init__()
@@ -25,32 +27,83 @@ class PDF(FPDF):
         self.set_font("Helvetica", "I", 8)
         self.cell(0, 10, "Generated by Admin", align="C")
 
+    def _table_header(self, columns, height):
+        self.set_font("Helvetica", "B", 10)
+        self.set_fill_color(128, 128, 128) # Grey
+        self.set_text_color(245, 245, 245) # Whitesmoke
+        for title, width, _ in columns:
+            self.cell(width, height, title, border=1, align="C", fill=True)
+        self.ln(height)
+        # Body style, set once per page rather than per row
+        self.set_font("Helvetica", "", 10)
+        self.set_fill_color(255, 255, 240) # Ivory
+        self.set_text_color(0, 0, 0)
 
-def generate_exam_result_pdf(exam_id, db_instance, output_dir="output"):
-    # Ensure output directory exists
-    os.makedirs(output_dir, exist_ok=True)
+    def _table_subtotal(self, columns, cells, height):
+        self.set_font("Helvetica", "B", 9)
+        for (_, width, _), text in zip(columns, cells):
+            self.cell(width, height, text, border=1, align="C")
+        self.ln(height)
+        self.set_font("Helvetica", "", 10)
+
+    def result_table(self, columns, rows, row_height=8, header_height=10, page_summary=None, progress_callback=None):
+        """Draw rows of cell strings as a table that breaks pages by itself.
+
+        columns are (title, width, align) tuples. The header row is repeated
+        at the top of every page. With page_summary, page_summary(first, end)
+        is called for the row index range drawn on each page and the cells it
+        returns are drawn as a bold subtotal row at the bottom of that page.
+        progress_callback(done, total) is called once per row. (Not named
+        table() so fpdf2's own FPDF.table() stays usable.)
+        """
+        widths = [width for _, width, _ in columns]
+        aligns = [align for _, _, align in columns]
+        total_rows = len(rows)
+        reserved = row_height if page_summary else 0
+        auto_break = self.auto_page_break
+        self.set_auto_page_break(False, self.b_margin)
+        try:
+            self._table_header(columns, header_height)
+            page_first = 0
+            fill = False
+            for i, cells in enumerate(rows):
+                if self.get_y() + row_height + reserved > self.page_break_trigger:
+                    if page_summary:
+                        self._table_subtotal(columns, page_summary(page_first, i), row_height)
+                    self.add_page()
+                    self._table_header(columns, header_height)
+                    page_first = i
+                for width, align, text in zip(widths, aligns, cells):
+                    self.cell(width, row_height, text, border=1, align=align, fill=fill)
+                self.ln(row_height)
+                fill = not fill # Alternate background color
+                if progress_callback:
+                    progress_callback(i + 1, total_rows)
+            if page_summary and total_rows:
+                self._table_subtotal(columns, page_summary(page_first, total_rows), row_height)
+        finally:
+            self.set_auto_page_break(auto_break, self.b_margin)
 
-    # Fetch exam details
-    db_instance.cursor.execute("SELECT exam_name, class_name, total_marks, exam_date FROM Exams WHERE exam_id = ?", (exam_id,))
-    exam_info = db_instance.cursor.fetchone()
+
+def fetch_exam_result_data(exam_id, db_instance):
+    """Read everything a result sheet needs into plain (picklable) data."""
+    exam_info = db_instance.get_exam(exam_id)
     if not exam_info:
         return None
-    exam_name, class_name, total_marks, exam_date = exam_info
+    # Ranks and stats come from the class analytics (ties share a rank, absent students are unranked)
+    return analytics.analyze_class(db_instance, exam_info[1], [exam_info]).exam_result(exam_id)
 
-    # Fetch marks and stats
-    highest = db_instance.get_highest_marks_for_exam(exam_id)
-    average = db_instance.get_average_marks_for_exam(exam_id)
-    students_marks = db_instance.get_marks_by_exam(exam_id)
-    
-    # Sort students by obtained marks descending
-    students_marks.sort(key=lambda x: x[2] if x[2] is not None else -1, reverse=True)
 
-    # Generate filename
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"Result_{class_name.replace(' ', '')}_{exam_name.replace(' ', '_')}_{timestamp}.pdf"
-    filepath = os.path.join(output_dir, filename)
+def add_result_sheet(pdf, data, progress_callback=None):
+    exam_name = data["exam_name"]
+    class_name = data["class_name"]
+    total_marks = data["total_marks"]
+    exam_date = data["exam_date"]
+    highest = data["highest"]
+    average = data["average"]
+    students_marks = data["students_marks"]
 
-    pdf = PDF(exam_name)
+    pdf.exam_name = exam_name
     pdf.add_page()
     
     # Setup Information
@@ -83,45 +136,71 @@ def generate_exam_result_pdf(exam_id, db_instance, output_dir="output"):
     pdf.cell(30, 8, "Average Marks:")
     pdf.set_font("Helvetica", "", 10)
     pdf.cell(60, 8, f"{average:.2f}")
-    pdf.ln(16)
-    
-    pdf.set_text_color(0, 0, 0) # Black
+    pdf.set_font("Helvetica", "B", 10)
+    pdf.cell(30, 8, "Std. Deviation:")
+    pdf.set_font("Helvetica", "", 10)
+    pdf.cell(60, 8, f"{data['std_dev']:.2f}")
+    pdf.ln(8)
 
-    # Results Table Header
+    # Line 4
     pdf.set_font("Helvetica", "B", 10)
-    pdf.set_fill_color(128, 128, 128) # Grey
-    pdf.set_text_color(245, 245, 245) # Whitesmoke
-    
-    col_widths = [20, 30, 70, 40, 30]
-    headers = ["Rank", "Student ID", "Student Name", "Obtained Marks", "Percentage"]
-    
-    for width, header in zip(col_widths, headers):
-        pdf.cell(width, 10, header, border=1, align="C", fill=True)
-    pdf.ln(10)
-    
-    # Table Content
+    pdf.cell(30, 8, "Present:")
+    pdf.set_font("Helvetica", "", 10)
+    pdf.cell(60, 8, str(data["present"]))
+    pdf.set_font("Helvetica", "B", 10)
+    pdf.cell(30, 8, "Absent:")
     pdf.set_font("Helvetica", "", 10)
-    pdf.set_fill_color(255, 255, 240) # Ivory
-    pdf.set_text_color(0, 0, 0)
+    pdf.cell(60, 8, str(data["absent"]))
+    pdf.ln(16)
     
-    fill = False
-    for rank, (std_id, name, marks) in enumerate(students_marks, start=1):
+    pdf.set_text_color(0, 0, 0) # Black
+
+    # Results table; header repeated and subtotals on every page
+    columns = [("Rank", 20, "C"), ("Student ID", 30, "C"), ("Student Name", 70, "L"),
+               ("Obtained Marks", 40, "C"), ("Percentage", 30, "C")]
+    rows = []
+    for (std_id, name, marks), rank in zip(students_marks, data["ranks"]):
         if marks is None:
-            marks_str = "Absent"
-            percentage_str = "N/A"
+            rows.append((str(rank) if rank else "-", str(std_id), str(name), "Absent", "N/A"))
         else:
-            marks_str = str(marks)
-            percentage = (marks / total_marks) * 100
-            percentage_str = f"{percentage:.2f}%"
-            
-        pdf.cell(col_widths[0], 10, str(rank), border=1, align="C", fill=fill)
-        pdf.cell(col_widths[1], 10, str(std_id), border=1, align="C", fill=fill)
-        pdf.cell(col_widths[2], 10, str(name), border=1, align="L", fill=fill)
-        pdf.cell(col_widths[3], 10, marks_str, border=1, align="C", fill=fill)
-        pdf.cell(col_widths[4], 10, percentage_str, border=1, align="C", fill=fill)
-        pdf.ln(10)
-        
-        fill = not fill # Alternate background color
-        
+            rows.append((str(rank) if rank else "-", str(std_id), str(name), str(marks),
+                         f"{(marks / total_marks) * 100:.2f}%"))
+
+    def page_summary(first, end):
+        marks = [m for _, _, m in students_marks[first:end] if m is not None]
+        average_text = f"Avg {sum(marks) / len(marks):.2f}" if marks else "Avg -"
+        return ("", "Page total", f"{end - first} students, {end - first - len(marks)} absent", average_text, "")
+
+    pdf.result_table(columns, rows, page_summary=page_summary, progress_callback=progress_callback)
+
+
+def result_sheet_filename(data, timestamp=None):
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"Result_{data['class_name'].replace(' ', '')}_{data['exam_name'].replace(' ', '_')}_{timestamp}.pdf"
+
+
+def render_exam_result_pdf_bytes(data, progress_callback=None):
+    """The result sheet as PDF bytes, for sharing or previewing without writing a file."""
+    pdf = PDF(data["exam_name"])
+    add_result_sheet(pdf, data, progress_callback)
+    return bytes(pdf.output())
+
+
+def render_exam_result_pdf(data, output_dir="output", filename=None, progress_callback=None):
+    # Ensure output directory exists
+    os.makedirs(output_dir, exist_ok=True)
+    filepath = os.path.join(output_dir, filename or result_sheet_filename(data))
+
+    pdf = PDF(data["exam_name"])
+    add_result_sheet(pdf, data, progress_callback)
     pdf.output(filepath)
     return os.path.abspath(filepath)
+
+
+def generate_exam_result_pdf(exam_id, db_instance, output_dir="output", progress_callback=None):
+    # progress_callback(done, total) is called once per result row; it may
+    # raise to abort (see jobs.BackgroundJob.report_progress)
+    data = fetch_exam_result_data(exam_id, db_instance)
+    if not data:
+        return None
+    return render_exam_result_pdf(data, output_dir, progress_callback=progress_callback)
@@ -0,0 +1,196 @@
+"""Opt-in query instrumentation for the Database layer.
+
+Enable with COACHING_QUERY_STATS=1 or from Settings -> Diagnostics. While
+enabled, Database cursors are InstrumentedCursor objects that record each
+statement's text, parameter count, duration (execute plus fetches) and rows
+returned. Calls are totalled per Database method and per screen (the one
+shown when the query ran), and statements slower than slow_threshold_ms are
+kept in a ring buffer. When disabled, Database uses plain sqlite3 cursors
+and nothing here is called.
+"""
+import collections
+import datetime
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+_setting = os.environ.get("COACHING_QUERY_STATS", "")
+enabled = bool(_setting) and _setting != "0"
+slow_threshold_ms = float(os.environ.get("COACHING_SLOW_QUERY_MS", "50"))
+slow_log_size = 100
+
+current_screen = None
+_lock = threading.Lock()
+_started = time.time()
+_totals = [0, 0.0, 0]   # calls, ms, rows
+_by_screen = {}         # screen -> [calls, ms, rows]
+_by_method = {}         # Database method -> [calls, ms, rows]
+_slow = collections.deque(maxlen=slow_log_size)
+
+_DATABASE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "database.py")
+
+
+def _caller():
+    # Innermost Database method on the stack, else the function that called in;
+    # iter_query is a generator, so its rows belong to whoever consumes them
+    # (comprehension frames are skipped the same way)
+    frame = sys._getframe(3)
+    while frame.f_back is not None and (frame.f_code.co_name == "iter_query" or frame.f_code.co_name.startswith("<")):
+        frame = frame.f_back
+    fallback = frame.f_code.co_name
+    while frame is not None:
+        if frame.f_code.co_filename == _DATABASE_FILE:
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return fallback
+
+
+class _Call:
+    __slots__ = ("sql", "params", "ms", "rows", "screen", "method", "at", "slow")
+
+    def __init__(self, sql, params):
+        self.sql = " ".join(sql.split())[:300]
+        self.params = params
+        self.ms = 0.0
+        self.rows = 0
+        self.screen = current_screen or "-"
+        self.method = _caller()
+        self.at = time.time()
+        self.slow = False
+
+    def as_dict(self):
+        return {
+            "sql": self.sql,
+            "params": self.params,
+            "ms": round(self.ms, 3),
+            "rows": self.rows,
+            "screen": self.screen,
+            "method": self.method,
+            "at": datetime.datetime.fromtimestamp(self.at).isoformat(timespec="seconds"),
+        }
+
+
+def _record(call, ms, rows, new_call=False):
+    # Adds to the call and to every total it belongs to; a SELECT is recorded
+    # on execute and then again for each fetch
+    call.ms += ms
+    call.rows += rows
+    with _lock:
+        for totals in (_totals, _by_screen.setdefault(call.screen, [0, 0.0, 0]),
+                       _by_method.setdefault(call.method, [0, 0.0, 0])):
+            totals[0] += new_call
+            totals[1] += ms
+            totals[2] += rows
+        if not call.slow and call.ms >= slow_threshold_ms:
+            call.slow = True
+            _slow.append(call)
+
+
+def _param_count(params):
+    try:
+        return len(params)
+    except TypeError:
+        return 0
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """sqlite3 cursor that reports every statement and fetch to this module."""
+    _call = None
+
+    def execute(self, sql, parameters=()):
+        if not enabled:
+            # Switched off while this cursor was alive
+            self._call = None
+            return super().execute(sql, parameters)
+        call = self._call = _Call(sql, _param_count(parameters))
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            rows = max(self.rowcount, 0) if self.description is None else 0
+            _record(call, (time.perf_counter() - start) * 1000, rows, new_call=True)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not enabled:
+            self._call = None
+            return super().executemany(sql, seq_of_parameters)
+        seq_of_parameters = list(seq_of_parameters)
+        call = self._call = _Call(sql, sum(_param_count(p) for p in seq_of_parameters))
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record(call, (time.perf_counter() - start) * 1000, max(self.rowcount, 0), new_call=True)
+
+    def _fetch(self, fetch, *args):
+        start = time.perf_counter()
+        result = fetch(*args)
+        if self._call is not None:
+            rows = len(result) if isinstance(result, list) else int(result is not None)
+            _record(self._call, (time.perf_counter() - start) * 1000, rows)
+        return result
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetch(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+
+def cursor_class():
+    return InstrumentedCursor if enabled else sqlite3.Cursor
+
+
+def enable(on=True):
+    """Turn recording on or off. Database picks it up for new cursors (see Database.reset_cursor)."""
+    global enabled
+    enabled = on
+
+
+def set_screen(name):
+    global current_screen
+    current_screen = name
+
+
+def reset():
+    global _started
+    with _lock:
+        _totals[:] = [0, 0.0, 0]
+        _by_screen.clear()
+        _by_method.clear()
+        _slow.clear()
+        _started = time.time()
+
+
+def _table(totals):
+    rows = [{"name": name, "calls": t[0], "ms": round(t[1], 3), "rows": t[2]} for name, t in totals.items()]
+    return sorted(rows, key=lambda r: r["ms"], reverse=True)
+
+
+def snapshot():
+    """Everything recorded so far as plain data (what dump_json writes)."""
+    with _lock:
+        return {
+            "enabled": enabled,
+            "since": datetime.datetime.fromtimestamp(_started).isoformat(timespec="seconds"),
+            "slow_threshold_ms": slow_threshold_ms,
+            "totals": {"calls": _totals[0], "ms": round(_totals[1], 3), "rows": _totals[2]},
+            "by_screen": _table(_by_screen),
+            "by_method": _table(_by_method),
+            "slow_queries": [call.as_dict() for call in reversed(_slow)],
+        }
+
+
+def dump_json(output_dir="output"):
+    """Write snapshot() to a timestamped JSON file in output_dir. Returns its absolute path."""
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"query_stats_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump(snapshot(), f, indent=2)
+    return os.path.abspath(path)
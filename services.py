@@ -0,0 +1,61 @@
+"""App-wide services created on first use.
+
+Nothing here is constructed at import time: the database (schema setup,
+migrations and seeding), the PDF stack (fpdf) and NumPy are only loaded
+when a screen first needs them, so none of them delays the login screen.
+"""
+import threading
+
+import startup_profiler
+
+
+class LazyService:
+    """Proxy that builds the real object on first attribute access."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    @property
+    def ready(self):
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+
+def _create_database():
+    with startup_profiler.phase("database init"):
+        from database import Database
+        return Database()
+
+
+def _load_pdf_generator():
+    with startup_profiler.phase("pdf import"):
+        import pdf_generator
+        return pdf_generator
+
+
+def _load_batch_reports():
+    import batch_reports
+    return batch_reports
+
+
+def _load_analytics():
+    with startup_profiler.phase("numpy import"):
+        import analytics
+        return analytics
+
+
+db = LazyService(_create_database)
+pdf = LazyService(_load_pdf_generator)
+batch_reports = LazyService(_load_batch_reports)
+analytics = LazyService(_load_analytics)
@@ -0,0 +1,102 @@
+"""Opt-in cold-start profiler.
+
+Enable with COACHING_PROFILE_STARTUP=1 (or set it to a log file path). While
+enabled, every first-time import is timed in the style of `python -X
+importtime`, and mark()/phase() record wall-clock markers. finish() appends
+the report to the log (startup_profile.log by default) so cold-start time can
+be tracked per release. When disabled, every function here is a no-op.
+"""
+import builtins
+import contextlib
+import datetime
+import importlib.util
+import os
+import sys
+import time
+
+START = time.perf_counter()
+
+_setting = os.environ.get("COACHING_PROFILE_STARTUP", "")
+enabled = bool(_setting) and _setting != "0"
+log_path = _setting if enabled and _setting not in ("1", "true", "yes") else "startup_profile.log"
+
+_marks = []     # (label, ms since START)
+_phases = []    # (label, duration ms)
+_imports = []   # (depth, module, self us, cumulative us)
+_stack = []     # cumulative child time of the imports in progress
+_original_import = builtins.__import__
+_finished = False
+
+
+def _resolve(name, globals, level):
+    if level == 0:
+        return name
+    package = (globals or {}).get("__package__") or ""
+    try:
+        return importlib.util.resolve_name("." * level + name, package)
+    except (ImportError, ValueError):
+        return name
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    module = _resolve(name, globals, level)
+    if module in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    _stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        total = (time.perf_counter() - start) * 1e6
+        children = _stack.pop()
+        if _stack:
+            _stack[-1] += total
+        _imports.append((len(_stack), module, total - children, total))
+
+
+def mark(label):
+    if enabled:
+        _marks.append((label, (time.perf_counter() - START) * 1000))
+
+
+@contextlib.contextmanager
+def phase(label):
+    if not enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((label, (time.perf_counter() - start) * 1000))
+
+
+def finish(release=""):
+    """Stop timing imports and append the report to the log file (once)."""
+    global _finished
+    if not enabled or _finished:
+        return None
+    _finished = True
+    builtins.__import__ = _original_import
+    mark("profile written")
+
+    lines = [f"=== startup {datetime.datetime.now().isoformat(timespec='seconds')} release={release or '?'} "
+             f"python={sys.version.split()[0]} platform={sys.platform}"]
+    lines.append("-- markers (ms since launch)")
+    lines += [f"{ms:10.1f}  {label}" for label, ms in _marks]
+    lines.append("-- phases (ms)")
+    lines += [f"{ms:10.1f}  {label}" for label, ms in _phases]
+    lines.append("-- imports: self [us] | cumulative [us] | module")
+    # Python's importtime prints children before parents; keep that order
+    lines += [f"{int(own):10d} | {int(total):10d} | {'  ' * depth}{module}" for depth, module, own, total in _imports]
+    top = sorted(_imports, key=lambda r: r[2], reverse=True)[:15]
+    lines.append("-- slowest imports by self time")
+    lines += [f"{own / 1000:10.1f} ms  {module}" for _, module, own, _ in top]
+
+    with open(log_path, "a") as f:
+        f.write("\n".join(lines) + "\n\n")
+    return log_path
+
+
+if enabled:
+    builtins.__import__ = _timed_import
@@ -0,0 +1,82 @@
+"""Ranks and statistics of analytics.ClassAnalytics on the edge cases: ties,
+exams nobody sat, a class of one and a class with no exams."""
+import numpy as np
+import pytest
+
+from analytics import ClassAnalytics, rank_columns
+
+N = np.nan
+
+
+def exams(count):
+    return [(j + 1, "Class 1", f"Exam {j + 1}", 100.0, f"2026-0{j + 1}-01") for j in range(count)]
+
+
+def students(count):
+    return [(f"S{i + 1}", f"Student {i + 1}") for i in range(count)]
+
+
+@pytest.mark.parametrize("scores, dense, competition", [
+    # Ties share a rank
+    ([[90], [90], [70]], [[1], [1], [2]], [[1], [1], [3]]),
+    ([[50], [80], [80], [80], [20]], [[2], [1], [1], [1], [3]], [[4], [1], [1], [1], [5]]),
+    # Columns are ranked separately; absent (NaN) cells get 0
+    ([[90, N], [70, 60], [N, 60]], [[1, 0], [2, 1], [0, 1]], [[1, 0], [2, 1], [0, 1]]),
+    # Nobody sat the exam
+    ([[N, 40], [N, 30]], [[0, 1], [0, 2]], [[0, 1], [0, 2]]),
+    # A single student
+    ([[35]], [[1]], [[1]]),
+], ids=["tie-at-top", "tie-in-middle", "absent-cells", "all-absent", "single-student"])
+def test_rank_columns(scores, dense, competition):
+    scores = np.array(scores, dtype=float)
+    got_dense, got_competition = rank_columns(scores, ~np.isnan(scores))
+    assert got_dense.tolist() == dense
+    assert got_competition.tolist() == competition
+
+
+def test_rank_columns_without_exams():
+    dense, competition = rank_columns(np.empty((3, 0)), np.empty((3, 0), dtype=bool))
+    assert dense.shape == competition.shape == (3, 0)
+
+
+def test_tied_exam_result():
+    analytics = ClassAnalytics("Class 1", students(3), exams(1), np.array([[90], [90], [70]], dtype=float))
+    result = analytics.exam_result(1)
+    assert result["ranks"] == [1, 1, 3]
+    assert [row[0] for row in result["students_marks"]] == ["S1", "S2", "S3"]
+    assert analytics.percentile[:, 0].tolist() == pytest.approx([100, 100, 100 / 3])
+    assert [s["rank"] for s in analytics.student_summaries()] == [1, 1, 3]
+
+
+def test_all_absent_exam():
+    analytics = ClassAnalytics("Class 1", students(2), exams(2), np.array([[N, 80], [N, 60]]))
+    summary = analytics.exam_summaries()[0]
+    assert (summary["present"], summary["absent"]) == (0, 2)
+    assert (summary["mean"], summary["std"], summary["highest"], summary["lowest"]) == (0, 0, 0, 0)
+    assert sum(summary["grades"].values()) == 0
+    result = analytics.exam_result(1)
+    assert result["ranks"] == [None, None]
+    assert [row[2] for row in result["students_marks"]] == [None, None]
+    assert [s["absentee_rate"] for s in analytics.student_summaries()] == [0.5, 0.5]
+
+
+def test_single_student():
+    analytics = ClassAnalytics("Class 1", students(1), exams(2), np.array([[40.0, 60.0]]))
+    assert analytics.exam_result(1)["ranks"] == [1]
+    assert analytics.percentile.tolist() == [[100, 100]]
+    (summary,) = analytics.student_summaries()
+    assert summary["rank"] == 1
+    assert summary["average_percent"] == pytest.approx(50)
+    assert summary["trend_slope"] == pytest.approx(20)
+
+
+def test_no_exams():
+    analytics = ClassAnalytics("Class 1", students(2), [], np.empty((2, 0)))
+    assert analytics.exam_summaries() == []
+    for summary in analytics.student_summaries():
+        assert summary["rank"] is None
+        assert summary["average_percent"] is None
+        assert summary["trend_slope"] is None
+        assert summary["absentee_rate"] == 0
+    with pytest.raises(KeyError):
+        analytics.exam_result(1)
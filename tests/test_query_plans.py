@@ -0,0 +1,80 @@
+"""The hot lookups must stay index searches (see MIGRATIONS), never table scans."""
+import pytest
+
+from database import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "plans.db"))
+    yield db
+    db.close()
+
+
+def query_plans(db, call):
+    # EXPLAIN QUERY PLAN of every SELECT that call() runs
+    statements = []
+    db.conn.set_trace_callback(statements.append)
+    try:
+        call()
+    finally:
+        db.conn.set_trace_callback(None)
+    selects = [s for s in statements if s.lstrip().upper().startswith(("SELECT", "WITH"))]
+    assert selects, "no query was run"
+    return ["\n".join(row[3] for row in db.conn.execute("EXPLAIN QUERY PLAN " + sql)) for sql in selects]
+
+
+def assert_searches(plan, table, index):
+    lines = [line for line in plan.splitlines() if f" {table} " in f" {line} "]
+    assert lines, f"{table} is not in the plan:\n{plan}"
+    assert not any(line.startswith("SCAN") for line in lines), f"full scan of {table}:\n{plan}"
+    assert any(line.startswith("SEARCH") and (f"INDEX {index} " in line + " ") for line in lines), \
+        f"{table} is not searched with {index}:\n{plan}"
+
+
+def test_marks_by_exam(db):
+    exam_id = db.add_exam("Class 9", "Test", 100, "2026-01-10")
+    plan, = query_plans(db, lambda: db.get_marks_by_exam(exam_id))
+    assert_searches(plan, "m", "idx_marks_exam_student")
+    assert_searches(plan, "s", "idx_students_class_status")
+
+
+def test_marks_by_student(db):
+    plan, = query_plans(db, lambda: db.get_marks_for_student("STU0001"))
+    assert_searches(plan, "m", "idx_marks_student")
+
+
+def test_payments_by_student_and_period(db):
+    std_id = db.add_student("Test Student", "", "", "01700000000", "", "Class 9", "")
+    plan, = query_plans(db, lambda: db.get_payments_for_student(std_id))
+    assert_searches(plan, "Payments", "idx_payments_student_month")
+    plans = query_plans(db, lambda: db.add_payment(std_id, "Class 9", "March", "2026", 500.0))
+    assert_searches(plans[0], "Payments", "idx_payments_student_period")
+
+
+def test_payments_page(db):
+    std_id = db.add_student("Test Student", "", "", "01700000000", "", "Class 9", "")
+    for year in ("2025", "2026"):
+        for month in ("January", "February", "March"):
+            db.add_payment(std_id, "Class 9", month, year, 500.0)
+    token = db.get_payments_for_student_page(std_id, limit=4)[1]
+    plan, = query_plans(db, lambda: db.get_payments_for_student_page(std_id, limit=4, after=token))
+    assert_searches(plan, "Payments", "idx_payments_student_month")
+
+    pages, token = [], None
+    while True:
+        rows, token = db.get_payments_for_student_page(std_id, limit=4, after=token)
+        pages += rows
+        if token is None:
+            break
+    assert pages == db.get_payments_for_student(std_id)
+
+
+def test_students_by_class_and_status(db):
+    plan, = query_plans(db, lambda: db.get_students_by_class("Class 9"))
+    assert_searches(plan, "Students", "idx_students_class_status")
+
+
+def test_exams_by_class(db):
+    plan, = query_plans(db, lambda: db.get_exams_by_class_page("Class 9"))
+    assert_searches(plan, "Exams", "idx_exams_class_date")
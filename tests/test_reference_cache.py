@@ -0,0 +1,28 @@
+"""Classes and exam headers are cached per database, never across databases."""
+from database import Database
+
+
+def test_in_memory_databases_do_not_share_a_cache():
+    first, second = Database(":memory:"), Database(":memory:")
+    try:
+        assert first.get_classes() == second.get_classes()
+        first.update_class_fee("Class 9", 1234.0)
+        assert first.get_class_fee("Class 9") == 1234.0
+        assert second.get_class_fee("Class 9") != 1234.0
+        assert [c[2] for c in second.get_classes() if c[1] == "Class 9"] != [1234.0]
+    finally:
+        first.close()
+        second.close()
+
+
+def test_file_database_shares_its_cache(tmp_path):
+    path = str(tmp_path / "shared.db")
+    writer = Database(path)
+    reader = writer.reader()
+    try:
+        reader.get_classes()
+        writer.update_class_fee("Class 9", 1234.0)
+        assert [c[2] for c in reader.get_classes() if c[1] == "Class 9"] == [1234.0]
+    finally:
+        reader.close()
+        writer.close()
@@ -0,0 +1,105 @@
+"""The trigger-maintained rollups (SummaryStats, MonthlyRevenueStats) must always
+match what rebuild_stats() computes from the base tables."""
+import pytest
+
+from database import GRADUATED, Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = Database(str(tmp_path / "stats.db"))
+    yield db
+    db.close()
+
+
+def rollups(db):
+    summary = db.conn.execute(
+        "SELECT total_students, total_batches, total_exams FROM SummaryStats WHERE id = 1").fetchone()
+    # Triggers leave emptied (class, month) rows at zero; a rebuild drops them
+    monthly = db.conn.execute("""
+        SELECT class_name, period, round(revenue, 2), payment_count FROM MonthlyRevenueStats
+        WHERE payment_count != 0 OR revenue != 0
+        ORDER BY class_name, period
+    """).fetchall()
+    return summary, monthly
+
+
+def assert_rollups_match_rebuild(db):
+    maintained = rollups(db)
+    db.rebuild_stats()
+    assert maintained == rollups(db)
+
+
+def add_students(db, count, class_name):
+    return [db.add_student(f"Student {i}", "", "", "01700000000", "", class_name, "A") for i in range(count)]
+
+
+def test_inserts(db):
+    students = add_students(db, 3, "Class 9")
+    db.add_exam("Class 9", "Weekly", 100, "2026-01-10")
+    for std_id in students:
+        for month in ("January", "February"):
+            db.add_payment(std_id, "Class 9", month, "2026", 500.0)
+    db.add_payment(students[0], "Class 9", "March", "2026", 500.0, paid_status="unpaid")
+    # Writers that only set year and month, including a month that is not one
+    db.conn.execute("INSERT INTO Payments (student_unique_id, class_name, month, year, amount, paid_status) "
+                    "VALUES (?, 'Class 9', 'april', '2026', 250.5, 'paid')", (students[1],))
+    db.conn.execute("INSERT INTO Payments (student_unique_id, class_name, month, year, amount, paid_status) "
+                    "VALUES (?, 'Class 9', 'Smarch', '2026', 100.0, 'paid')", (students[2],))
+    db.conn.commit()
+    assert_rollups_match_rebuild(db)
+
+
+@pytest.mark.parametrize("change", [
+    "class_name = 'Class 10'",
+    "month = 'July'",
+    "month = 'Smarch'",
+    "year = '2025'",
+    "amount = amount + 125.25",
+    "paid_status = 'unpaid'",
+    "paid_status = 'paid'",
+    "class_name = 'Class 10', month = 'December', amount = 50.0, paid_status = 'paid'",
+])
+def test_payment_updates(db, change):
+    students = add_students(db, 2, "Class 9")
+    for std_id in students:
+        db.add_payment(std_id, "Class 9", "May", "2026", 500.0)
+        db.add_payment(std_id, "Class 9", "June", "2026", 500.0, paid_status="unpaid")
+    db.conn.execute(f"UPDATE Payments SET {change} WHERE student_unique_id = ? AND month = 'May'", (students[0],))
+    db.conn.execute(f"UPDATE Payments SET {change} WHERE student_unique_id = ? AND month = 'June'", (students[1],))
+    db.conn.commit()
+    assert_rollups_match_rebuild(db)
+
+
+def test_add_payment_overwrites(db):
+    std_id, = add_students(db, 1, "Class 9")
+    db.add_payment(std_id, "Class 9", "May", "2026", 500.0, paid_status="unpaid")
+    db.add_payment(std_id, "Class 9", "May", "2026", 450.0)
+    db.add_payment(std_id, "Class 9", "June", "2026", 500.0)
+    db.add_payment(std_id, "Class 9", "June", "2026", 500.0, paid_status="unpaid")
+    assert_rollups_match_rebuild(db)
+
+
+def test_student_changes(db):
+    students = add_students(db, 4, "Class 10")
+    for std_id in students:
+        db.add_payment(std_id, "Class 10", "January", "2026", 700.0)
+    db.promote_student(students[0], GRADUATED, "passed")
+    db.promote_student(students[1], "Class 9", "moved back")
+    db.conn.execute("UPDATE Students SET status = 'inactive' WHERE unique_student_id = ?", (students[2],))
+    db.conn.commit()
+    assert_rollups_match_rebuild(db)
+
+
+def test_cascaded_deletes(db):
+    students = add_students(db, 3, "Class 9")
+    exam_id = db.add_exam("Class 9", "Monthly", 50, "2026-02-01")
+    for std_id in students:
+        db.add_payment(std_id, "Class 9", "February", "2026", 500.0)
+        db.add_or_update_mark(std_id, exam_id, 40.0)
+    # The student's payments go with them
+    db.delete_student(students[0])
+    db.delete_exam(exam_id)
+    assert db.conn.execute("SELECT COUNT(*) FROM Payments WHERE student_unique_id = ?",
+                           (students[0],)).fetchone()[0] == 0
+    assert_rollups_match_rebuild(db)
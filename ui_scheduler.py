@@ -0,0 +1,76 @@
+import time
+
+from kivy.clock import Clock
+from kivy.metrics import dp
+from kivy.uix.label import Label
+
+
+class IncrementalBuilder:
+    """Adds widgets to containers a chunk at a time, one chunk per frame.
+
+    Each queued task is (container, items, make) where make(item) returns the
+    widgets for one item. Every frame the builder adds items until
+    frame_budget seconds have been spent (always at least one item), then
+    yields to the render loop. A "Loading..." placeholder sits in each
+    container until its items are all added. cancel() stops the build where
+    it is; screens call it from on_leave.
+    """
+
+    # Seconds of widget building allowed per frame (a 60 fps frame is ~0.016)
+    frame_budget = 0.008
+
+    def __init__(self, frame_budget=None, on_done=None):
+        if frame_budget is not None:
+            self.frame_budget = frame_budget
+        self.on_done = on_done
+        self._tasks = []
+        self._event = None
+
+    @property
+    def running(self):
+        return self._event is not None
+
+    def add(self, container, items, make, placeholder=True):
+        items = list(items)
+        label = None
+        if placeholder and items:
+            label = Label(text=f"Loading... 0/{len(items)}", size_hint_y=None, height=dp(30))
+            container.add_widget(label)
+        self._tasks.append([container, items, 0, make, label])
+        if self._event is None:
+            self._event = Clock.schedule_once(self._step, 0)
+        return self
+
+    def cancel(self):
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+        for container, items, done, make, label in self._tasks:
+            if label is not None:
+                container.remove_widget(label)
+        self._tasks = []
+
+    def _step(self, dt):
+        deadline = time.perf_counter() + self.frame_budget
+        while self._tasks:
+            task = self._tasks[0]
+            container, items, done, make, label = task
+            while done < len(items):
+                for widget in make(items[done]):
+                    container.add_widget(widget)
+                done += 1
+                if time.perf_counter() >= deadline and done < len(items):
+                    task[2] = done
+                    if label is not None:
+                        label.text = f"Loading... {done}/{len(items)}"
+                    self._event = Clock.schedule_once(self._step, 0)
+                    return
+            if label is not None:
+                container.remove_widget(label)
+            self._tasks.pop(0)
+            if time.perf_counter() >= deadline and self._tasks:
+                self._event = Clock.schedule_once(self._step, 0)
+                return
+        self._event = None
+        if self.on_done:
+            self.on_done()